@@ -1,35 +1,236 @@
-from django.contrib import admin
-from django.urls import reverse
-from django.utils.html import format_html
-from .models import Mobile, Invoice, InvoiceItem
+from decimal import Decimal, InvalidOperation
+from functools import wraps
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseNotAllowed
+from django.shortcuts import render
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+from .customers import normalize_gstin, normalize_phone, phone_prefix_range
+from .invoice_data import InvoiceData
+from .models import (
+    Customer, Mobile, MobileHistory, Invoice, InvoiceArchive, InvoiceHistory, InvoiceItem, InvoiceSeries,
+    PriceChange, StockCheckpoint, StockMovement, Store,
+)
+from . import repricing
+from .pdf_archive import finalize_invoice
+from .paginators import EstimatedCountPaginator
+from .query_budget import query_budget
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
 from django.utils import timezone
 
 # Register your models here.
 
+def listing_budget(max_queries):
+    """query_budget for a changelist page; actions POSTed to it (bulk delete,
+    finalize) scale with the selection and are left out
+    """
+    def decorator(view):
+        budgeted = query_budget(max_queries)(view)
+        
+        @wraps(view)
+        def changelist_view(self, request, *args, **kwargs):
+            if 'action' in request.POST:
+                return view(self, request, *args, **kwargs)
+            return budgeted(self, request, *args, **kwargs)
+        return changelist_view
+    return decorator
+
+
+@admin.register(Store)
+class StoreAdmin(admin.ModelAdmin):
+    list_display = ['name', 'code', 'invoice_prefix', 'company_gstin', 'company_state']
+    search_fields = ['name', 'code']
+    filter_horizontal = ['staff']
+    
+    fieldsets = (
+        ('Branch', {
+            'fields': ('name', 'code', 'invoice_prefix', 'staff')
+        }),
+        ('Letterhead', {
+            'fields': ('company_name', 'company_address', 'company_gstin', 'company_state', 'company_state_code')
+        }),
+    )
+
+
+class StoreScopedAdmin(admin.ModelAdmin):
+    """Staff only see and pick the branches they work at (superusers see all)"""
+    
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.user.is_superuser:
+            return queryset
+        # Subquery on the store-led indexes
+        return self.filter_stores(queryset, Store.objects.for_user(request.user).values('pk'))
+    
+    def filter_stores(self, queryset, stores):
+        return queryset.filter(store__in=stores)
+    
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'store':
+            kwargs['queryset'] = Store.objects.for_user(request.user)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+    
+    def get_changeform_initial_data(self, request):
+        initial = super().get_changeform_initial_data(request)
+        stores = list(Store.objects.for_user(request.user).values_list('pk', flat=True)[:2])
+        if len(stores) == 1:
+            initial.setdefault('store', stores[0])
+        return initial
+
+
+@admin.register(Customer)
+class CustomerAdmin(admin.ModelAdmin):
+    list_display = ['name', 'phone', 'gstin', 'created_at']
+    search_fields = ['name', 'phone', 'gstin']
+    readonly_fields = ['purchase_history', 'created_at', 'updated_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    fieldsets = (
+        ('Customer', {
+            'fields': ('name', 'phone', 'gstin')
+        }),
+        ('History', {
+            'fields': ('purchase_history', 'created_at', 'updated_at')
+        }),
+    )
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Phone numbers and GSTINs are exact (or prefix range) lookups on the
+        # unique indexes rather than LIKE '%...%' over every row
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        phone, gstin = normalize_phone(term), normalize_gstin(term)
+        if phone:
+            return queryset.filter(phone=phone), False
+        if gstin:
+            return queryset.filter(gstin=gstin), False
+        prefix = phone_prefix_range(term) if not any(c.isalpha() for c in term) else None
+        if prefix:
+            return queryset.filter(phone__gte=prefix[0], phone__lt=prefix[1]), False
+        if len(term) >= 4 and term[:2].isdigit():
+            return queryset.filter(gstin__startswith=term.upper()), False
+        return queryset.filter(name__istartswith=term), False
+    
+    def get_object(self, request, object_id, from_field=None):
+        customer = super().get_object(request, object_id, from_field)
+        if customer is not None and not request.user.is_superuser:
+            # Read-only fields only get the object: carry the staff member's branches along
+            customer.history_stores = Store.objects.for_user(request.user)
+        return customer
+    
+    def purchase_history(self, obj):
+        if obj.pk is None:
+            return '-'
+        rows = [
+            (
+                mobile.sold_date.strftime('%d-%m-%Y') if mobile.sold_date else '-',
+                f'{mobile.name} {mobile.model}',
+                mobile.imei_number,
+                f'₹ {mobile.selling_price:.2f}' if mobile.selling_price is not None else '-',
+                mobile.invoice_number or '-',
+            )
+            for mobile in obj.purchase_history(stores=getattr(obj, 'history_stores', None))
+        ]
+        if not rows:
+            return 'No purchases yet'
+        return format_html(
+            '<table><thead><tr><th>Sold</th><th>Phone</th><th>IMEI</th><th>Price</th><th>Invoice</th></tr></thead>'
+            '<tbody>{}</tbody></table>',
+            format_html_join('', '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>', rows),
+        )
+    purchase_history.short_description = 'Purchase history'
+
+
+class RepriceForm(forms.Form):
+    mode = forms.ChoiceField(choices=repricing.MODES)
+    value = forms.DecimalField(required=False, max_digits=10, decimal_places=2,
+                               help_text="New price, or markup percentage over purchase price")
+    round_99 = forms.BooleanField(required=False, label="Round up to a ₹99 ending")
+    min_age_days = forms.IntegerField(required=False, min_value=0, label="Only if in stock for at least (days)")
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('mode') in (repricing.SET, repricing.MARKUP) and cleaned_data.get('value') is None:
+            self.add_error('value', "Required for this mode.")
+        return cleaned_data
+    
+    def rule(self, ids):
+        return repricing.RepriceRule(ids=ids, **self.cleaned_data)
+
+
 @admin.register(Mobile)
-class MobileAdmin(admin.ModelAdmin):
-    list_display = ['name', 'model', 'imei_number', 'purchase_price', 'selling_price', 'status', 'customer_name', 'stock_in_date', 'profit']
-    list_filter = ['status', 'stock_in_date', 'sold_date']
+class MobileAdmin(StoreScopedAdmin):
+    list_display = ['name', 'model', 'imei_number', 'purchase_price', 'selling_price', 'status', 'customer_name', 'stock_in_date', 'profit', 'store']
+    list_filter = ['store', 'status', 'sold_date']
+    list_select_related = ['store']
     search_fields = ['name', 'model', 'imei_number', 'customer_name', 'customer_number']
     readonly_fields = ['stock_in_date', 'profit']
+    autocomplete_fields = ['customer']
+    date_hierarchy = 'stock_in_date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['reprice']
     
     fieldsets = (
         ('Mobile Details', {
-            'fields': ('name', 'model', 'imei_number', 'purchase_price', 'stock_in_date')
+            'fields': ('store', 'name', 'model', 'imei_number', 'purchase_price', 'stock_in_date')
         }),
         ('Sale Information', {
-            'fields': ('status', 'selling_price', 'sold_date', 'customer_name', 'customer_number')
+            'fields': ('status', 'selling_price', 'sold_date', 'customer', 'customer_name', 'customer_number')
         }),
     )
     
+    @listing_budget(10)
+    def changelist_view(self, request, extra_context=None):
+        return super().changelist_view(request, extra_context)
+    
     def save_model(self, request, obj, form, change):
         # Automatically set sold_date when status changes to sold
         if obj.status == 'sold' and not obj.sold_date:
             obj.sold_date = timezone.now()
         # Clear sold_date if status changed back to available
+        # (the sale itself stays in the stock ledger)
         if obj.status == 'available':
             obj.sold_date = None
         super().save_model(request, obj, form, change)
+    
+    def delete_queryset(self, request, queryset):
+        # Per-object delete so each removal is written to the stock ledger
+        with transaction.atomic():
+            for obj in queryset:
+                obj.delete()
+    
+    @admin.action(description="Reprice selected mobiles", permissions=['change'])
+    def reprice(self, request, queryset):
+        """Intermediate page: pick a rule, review the diff, then apply it in one UPDATE"""
+        ids = list(queryset.values_list('pk', flat=True))
+        form = RepriceForm(request.POST if 'mode' in request.POST else None)
+        rows = None
+        if form.is_valid():
+            rules = [form.rule(ids)]
+            if 'apply' in request.POST:
+                count = repricing.apply(rules, user=request.user)
+                self.message_user(request, f"Repriced {count} mobile(s).", messages.SUCCESS)
+                return None
+            rows = list(repricing.preview(rules))
+        context = {
+            **self.admin_site.each_context(request),
+            'title': "Reprice mobiles",
+            'opts': self.model._meta,
+            'form': form,
+            'rows': rows,
+            'ids': ids,
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        }
+        return render(request, 'admin/management/mobile/reprice.html', context)
 
 
 class InvoiceItemInline(admin.TabularInline):
@@ -41,21 +242,32 @@ class InvoiceItemInline(admin.TabularInline):
     def amount(self, obj):
         return f"₹ {obj.amount:.2f}"
     amount.short_description = 'Amount'
+    
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'mobile' and not request.user.is_superuser:
+            kwargs['queryset'] = Mobile.objects.filter(store__in=Store.objects.for_user(request.user).values('pk'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
 @admin.register(Invoice)
-class InvoiceAdmin(admin.ModelAdmin):
-    list_display = ['invoice_number', 'buyer_name', 'invoice_date', 'get_subtotal_display', 'get_total_display', 'pdf_link', 'is_draft']
-    list_filter = ['invoice_date', 'is_draft', 'created_at']
+class InvoiceAdmin(StoreScopedAdmin):
+    list_display = ['invoice_number', 'buyer_name', 'invoice_date', 'get_subtotal_display', 'get_total_display', 'pdf_link', 'is_draft', 'store']
+    list_filter = ['store', 'is_draft', 'created_at']
+    list_select_related = ['store']
     search_fields = ['invoice_number', 'buyer_name', 'buyer_gstin', 'buyer_address']
-    readonly_fields = ['invoice_number', 'created_at', 'updated_at', 'get_subtotal', 'get_cgst', 'get_sgst', 'get_total', 'get_roundoff']
+    date_hierarchy = 'invoice_date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ['invoice_number', 'is_draft', 'created_at', 'updated_at', 'get_subtotal', 'get_cgst', 'get_sgst', 'get_total', 'get_roundoff']
+    autocomplete_fields = ['customer']
+    actions = ['finalize']
     
     fieldsets = (
         ('Invoice Details', {
-            'fields': ('invoice_number', 'invoice_date', 'is_draft')
+            'fields': ('store', 'invoice_number', 'invoice_date', 'is_draft')
         }),
         ('Customer Information', {
-            'fields': ('buyer_name', 'buyer_address', 'buyer_gstin', 'buyer_state', 'buyer_state_code')
+            'fields': ('customer', 'buyer_name', 'buyer_address', 'buyer_gstin', 'buyer_state', 'buyer_state_code')
         }),
         ('Delivery Details', {
             'fields': ('delivery_note', 'delivery_date')
@@ -74,14 +286,90 @@ class InvoiceAdmin(admin.ModelAdmin):
     )
     
     inlines = [InvoiceItemInline]
+    change_form_template = 'admin/management/invoice/change_form.html'
+    
+    def get_urls(self):
+        urls = [
+            path('preview/', self.admin_site.admin_view(self.live_preview_view), name='management_invoice_live_preview'),
+        ]
+        return urls + super().get_urls()
+    
+    def live_preview_view(self, request):
+        """Render the invoice sheet from the unsaved change form (POSTed by the preview pane)"""
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        obj = None
+        object_id = request.GET.get('object_id')
+        if object_id:
+            # Unknown ids and other branches' invoices are not in get_queryset()
+            obj = self.get_object(request, object_id)
+            if obj is None or not self.has_view_or_change_permission(request, obj):
+                raise PermissionDenied
+        elif not self.has_add_permission(request):
+            raise PermissionDenied
+        if obj is not None and not self.has_change_permission(request, obj):
+            # View-only (archived) invoices: nothing in the form is editable
+            invoice, items = obj, None
+        else:
+            form = self.get_form(request, obj)(request.POST, instance=obj or Invoice())
+            form.is_valid()  # best effort: invalid fields keep their current value
+            invoice = form.instance
+            items = self._preview_items(request.POST, Store.objects.for_user(request.user).values('pk'))
+            if invoice.store_id is None:
+                # Letterhead of the branch the invoice would default to
+                invoice.store = Store.objects.for_user(request.user).first()
+        context = {
+            'invoice': invoice,
+            'data': InvoiceData(invoice, items=items),
+        }
+        return render(request, 'invoice_sheet.html', context)
+    
+    @staticmethod
+    def _preview_items(data, stores, prefix='items'):
+        """Unsaved InvoiceItems from the inline formset, mobiles loaded in one query.
+
+        Only mobiles of ``stores`` resolve, like the inline's mobile choices.
+        """
+        def number(value, cast):
+            try:
+                return cast(value)
+            except (TypeError, ValueError, InvalidOperation):
+                return None
+        
+        rows = []
+        for i in range(number(data.get(f'{prefix}-TOTAL_FORMS'), int) or 0):
+            key = f'{prefix}-{i}-'
+            if data.get(key + 'DELETE'):
+                continue
+            mobile_id = number(data.get(key + 'mobile'), int)
+            rate = number(data.get(key + 'rate'), Decimal)
+            if mobile_id is None and rate is None:
+                continue
+            rows.append((mobile_id, data.get(key + 'hsn_code', ''), number(data.get(key + 'quantity'), int), rate))
+        
+        mobiles = Mobile.objects.filter(store__in=stores).in_bulk([row[0] for row in rows if row[0] is not None])
+        return [
+            InvoiceItem(mobile=mobiles.get(mobile_id), hsn_code=hsn_code, quantity=quantity, rate=rate)
+            for mobile_id, hsn_code, quantity, rate in rows
+        ]
+    
+    def get_queryset(self, request):
+        # Totals come from one aggregate instead of several queries per row
+        return super().get_queryset(request).with_totals()
+    
+    @listing_budget(10)
+    def changelist_view(self, request, extra_context=None):
+        return super().changelist_view(request, extra_context)
     
     def get_subtotal_display(self, obj):
-        return f"₹ {obj.get_subtotal():.2f}"
+        return f"₹ {obj._subtotal:.2f}"
     get_subtotal_display.short_description = 'Subtotal'
+    get_subtotal_display.admin_order_field = '_subtotal'
     
     def get_total_display(self, obj):
-        return f"₹ {obj.get_grand_total():.2f}"
+        return f"₹ {obj._grand_total:.2f}"
     get_total_display.short_description = 'Total'
+    get_total_display.admin_order_field = '_grand_total'
     
     def get_subtotal(self, obj):
         return f"₹ {obj.get_subtotal():.2f}"
@@ -112,18 +400,143 @@ class InvoiceAdmin(admin.ModelAdmin):
     
     def save_model(self, request, obj, form, change):
         if not change:  # New invoice
-            # Generate invoice number
-            last_invoice = Invoice.objects.filter(invoice_date__year=timezone.now().year).order_by('-id').first()
-            year = timezone.now().year
-            number = 1
-            if last_invoice:
-                try:
-                    number = int(last_invoice.invoice_number.split('-')[1]) + 1
-                except:
-                    number = 1
-            obj.invoice_number = f"{year}-{number:04d}"
+            # Next number in the store's own series for this year
+            obj.invoice_number = InvoiceSeries.next_invoice_number(obj.store, timezone.now().year)
         
         super().save_model(request, obj, form, change)
+    
+    @admin.action(description="Finalize selected invoices (freezes the PDF, read-only afterwards)", permissions=['change'])
+    def finalize(self, request, queryset):
+        invoices = list(queryset.filter(archive__isnull=True).select_related('store'))
+        for invoice in invoices:
+            finalize_invoice(invoice)
+        self.message_user(request, f"Finalized {len(invoices)} invoice(s).", messages.SUCCESS)
+    
+    def has_change_permission(self, request, obj=None):
+        # Archived invoices are legally final - view only
+        if obj is not None and InvoiceArchive.objects.filter(invoice=obj).exists():
+            return False
+        return super().has_change_permission(request, obj)
+
+
+class MobileScopedAdmin(StoreScopedAdmin):
+    """Rows without a store of their own follow their mobile's, hot or archived"""
+    
+    def filter_stores(self, queryset, stores):
+        return queryset.filter(mobile_id__in=MobileHistory.objects.filter(store__in=stores).values('pk'))
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(MobileScopedAdmin):
+    list_display = ['occurred_at', 'kind', 'mobile_imei', 'quantity', 'value', 'note']
+    list_filter = ['kind']
+    search_fields = ['note']
+    date_hierarchy = 'occurred_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        # Archived mobiles are gone from the hot table, so label rows from the
+        # unified view instead of joining Mobile
+        imei = MobileHistory.objects.filter(pk=OuterRef('mobile_id')).values('imei_number')[:1]
+        return super().get_queryset(request).annotate(mobile_imei=Subquery(imei))
+    
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        mobiles = MobileHistory.objects.filter(
+            Q(imei_number=term) | Q(name__icontains=term) | Q(model__icontains=term)
+        ).values('pk')
+        return queryset.filter(Q(mobile_id__in=mobiles) | Q(note__icontains=term)), False
+    
+    def mobile_imei(self, obj):
+        return obj.mobile_imei or f'#{obj.mobile_id}'
+    mobile_imei.short_description = 'IMEI'
+    
+    # The ledger is append-only; rows are written by Mobile.save()
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PriceChange)
+class PriceChangeAdmin(MobileScopedAdmin):
+    list_display = ['changed_at', 'mobile_imei', 'old_price', 'new_price', 'rule', 'changed_by']
+    list_select_related = ['changed_by']
+    search_fields = ['rule']
+    date_hierarchy = 'changed_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        # Like the stock ledger, rows may point at archived mobiles
+        imei = MobileHistory.objects.filter(pk=OuterRef('mobile_id')).values('imei_number')[:1]
+        return super().get_queryset(request).annotate(mobile_imei=Subquery(imei))
+    
+    def mobile_imei(self, obj):
+        return obj.mobile_imei or f'#{obj.mobile_id}'
+    mobile_imei.short_description = 'IMEI'
+    
+    # History is written by the repricing tool only
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
+@admin.register(StockCheckpoint)
+class StockCheckpointAdmin(admin.ModelAdmin):
+    list_display = ['taken_at', 'quantity', 'value', 'created_at']
+    date_hierarchy = 'taken_at'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class HistoryAdmin(StoreScopedAdmin):
+    """Read-only listing over a hot + archived database view"""
+    list_filter = ['archived']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
 
+
+@admin.register(MobileHistory)
+class MobileHistoryAdmin(HistoryAdmin):
+    list_display = ['name', 'model', 'imei_number', 'purchase_price', 'selling_price', 'status', 'customer_name', 'sold_date', 'archived']
+    list_filter = ['archived', 'status']
+    search_fields = ['imei_number', 'name', 'model', 'customer_name', 'customer_number']
+    date_hierarchy = 'stock_in_date'
+
+
+@admin.register(InvoiceHistory)
+class InvoiceHistoryAdmin(HistoryAdmin):
+    list_display = ['invoice_number', 'buyer_name', 'buyer_gstin', 'invoice_date', 'is_draft', 'archived', 'pdf_link']
+    search_fields = ['invoice_number', 'buyer_name', 'buyer_gstin']
+    date_hierarchy = 'invoice_date'
+    
+    def pdf_link(self, obj):
+        return format_html(
+            '<a class="button" href="/invoices/{}/pdf/">Download PDF</a>',
+            obj.id
+        )
+    pdf_link.short_description = 'PDF'
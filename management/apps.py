@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ManagementConfig(AppConfig):
     name = 'management'
+    
+    def ready(self):
+        # ReportLab is imported lazily; print workers can opt into paying
+        # that cost at boot instead of on their first PDF
+        if getattr(settings, 'PRELOAD_INVOICE_PDF', False):
+            from .invoice_pdf import warm_up
+            warm_up()
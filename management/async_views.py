@@ -0,0 +1,45 @@
+"""Async versions of the public catalog views, routed when served over ASGI.
+
+Under uvicorn (project/asgi.py) they run on the event loop instead of
+holding a thread each; under WSGI the sync views in ``views`` are used, as
+running an async view there costs an event loop per request. The catalog
+templates are static today, so nothing is queried; once one lists stock,
+fetch it with the async ORM before rendering - templates must not hit the
+database.
+"""
+from django.shortcuts import render
+
+from .public_site import public_page
+
+
+@public_page
+async def index(request):
+    """Home page: highlights"""
+    context = {
+        'company_name': 'Venkateshwara Mobiles',
+    }
+    return render(request, 'home.html', context)
+
+
+@public_page
+async def phones(request):
+    """Phones listing page"""
+    return render(request, 'phones.html')
+
+
+@public_page
+async def services(request):
+    """Services page"""
+    return render(request, 'services.html')
+
+
+@public_page
+async def about(request):
+    """About page"""
+    return render(request, 'about.html')
+
+
+@public_page
+async def contact(request):
+    """Contact page"""
+    return render(request, 'contact.html')
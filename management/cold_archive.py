@@ -0,0 +1,112 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from django.utils import timezone
+
+from .models import (
+    ArchivedInvoice, ArchivedInvoiceItem, ArchivedMobile, Invoice, InvoiceArchive, InvoiceItem, Mobile,
+)
+from .pdf_archive import archive_invoice
+
+
+COMPANY_FIELDS = ['company_name', 'company_address', 'company_gstin', 'company_state', 'company_state_code']
+
+
+def cutoff_for(days=None):
+    days = settings.COLD_ARCHIVE_AFTER_DAYS if days is None else days
+    return timezone.now() - datetime.timedelta(days=days)
+
+
+def eligible_invoices(cutoff):
+    return Invoice.objects.filter(is_draft=False, invoice_date__lt=cutoff.date())
+
+
+def eligible_mobiles(cutoff, pending_invoices=None):
+    """Sold before ``cutoff`` and on no hot invoice (InvoiceItem.mobile is PROTECT).
+
+    With ``pending_invoices``, items on those invoices are ignored, as they
+    are about to be archived themselves (used for dry runs).
+    """
+    items = InvoiceItem.objects.filter(mobile=OuterRef('pk'))
+    if pending_invoices is not None:
+        items = items.exclude(invoice__in=pending_invoices)
+    return Mobile.objects.filter(status='sold', sold_date__lt=cutoff).filter(~Exists(items))
+
+
+def _copy(obj, model, **extra):
+    """Unsaved ``model`` row with every field ``obj`` shares with it, primary key included"""
+    names = {field.attname for field in model._meta.concrete_fields}
+    values = {field.attname: getattr(obj, field.attname) for field in obj._meta.concrete_fields if field.attname in names}
+    return model(**values, **extra)
+
+
+def archive_invoices(cutoff, batch_size=500):
+    """Move closed invoices (with their items) dated before ``cutoff``; returns the count"""
+    moved = 0
+    while True:
+        ids = list(eligible_invoices(cutoff).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return moved
+        # The frozen PDF is the legal copy - make sure it exists before the move
+        # (rendering happens outside the transaction), items loaded per batch
+        pending = Invoice.objects.filter(pk__in=ids, archive__isnull=True).select_related('archive', 'store')
+        for invoice in pending.prefetch_related(Prefetch('items', queryset=InvoiceItem.objects.select_related('mobile'))):
+            archive_invoice(invoice)
+
+        with transaction.atomic():
+            invoices = list(
+                eligible_invoices(cutoff).select_for_update(of=('self',)).select_related('archive', 'store').filter(pk__in=ids)
+            )
+            ids = [invoice.pk for invoice in invoices]
+            items = InvoiceItem.objects.filter(invoice__in=ids).select_related('mobile')
+            # Archived invoices keep their own copy of the letterhead details
+            ArchivedInvoice.objects.bulk_create([
+                _copy(invoice, ArchivedInvoice, sha256=invoice.archive.sha256, size=invoice.archive.size,
+                      **{field: getattr(invoice.store, field) for field in COMPANY_FIELDS})
+                for invoice in invoices
+            ])
+            ArchivedInvoiceItem.objects.bulk_create([
+                _copy(item, ArchivedInvoiceItem, description=f'{item.mobile.name} {item.mobile.model}',
+                      imei_number=item.mobile.imei_number)
+                for item in items
+            ])
+            InvoiceArchive.objects.filter(invoice__in=ids).delete()
+            Invoice.objects.filter(pk__in=ids).delete()
+        moved += len(ids)
+
+
+def archive_mobiles(cutoff, batch_size=500):
+    """Move sold mobiles no hot invoice refers to; returns the count.
+
+    Stock movements keep pointing at the same ids (the ledger has no
+    database constraint), so stock history is unaffected.
+    """
+    moved = 0
+    while True:
+        ids = list(eligible_mobiles(cutoff).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return moved
+        with transaction.atomic():
+            mobiles = list(eligible_mobiles(cutoff).select_for_update().filter(pk__in=ids))
+            ids = [mobile.pk for mobile in mobiles]
+            ArchivedMobile.objects.bulk_create([_copy(mobile, ArchivedMobile) for mobile in mobiles])
+            # QuerySet.delete(): no ledger rows, these phones left stock when sold
+            Mobile.objects.filter(pk__in=ids).delete()
+        moved += len(ids)
+
+
+def archive_old_records(days=None, batch_size=500, dry_run=False):
+    """Move invoices first, which frees their mobiles from the PROTECT relation"""
+    cutoff = cutoff_for(days)
+    if dry_run:
+        pending = eligible_invoices(cutoff)
+        return {
+            'invoices': pending.count(),
+            'mobiles': eligible_mobiles(cutoff, pending_invoices=pending.values('pk')).count(),
+        }
+    return {
+        'invoices': archive_invoices(cutoff, batch_size),
+        'mobiles': archive_mobiles(cutoff, batch_size),
+    }
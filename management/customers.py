@@ -0,0 +1,46 @@
+import re
+
+
+GSTIN_RE = re.compile(r'^\d{2}[A-Z]{5}\d{4}[A-Z][1-9A-Z]Z[0-9A-Z]$')
+DEFAULT_COUNTRY_CODE = '91'
+
+
+def normalize_phone(value):
+    """E.164 form of an Indian mobile number ('+919848012345'), or None.
+
+    Accepts the usual ways numbers get typed in: spaces, dashes, a leading
+    0, 91 or +91.
+    """
+    if not value:
+        return None
+    digits = re.sub(r'\D', '', value)
+    if value.strip().startswith('+') and 10 < len(digits) <= 15 and not digits.startswith(DEFAULT_COUNTRY_CODE):
+        return f'+{digits}'
+    if len(digits) == 11 and digits.startswith('0'):
+        digits = digits[1:]
+    elif len(digits) == 12 and digits.startswith(DEFAULT_COUNTRY_CODE):
+        digits = digits[2:]
+    if len(digits) != 10:
+        return None
+    return f'+{DEFAULT_COUNTRY_CODE}{digits}'
+
+
+def normalize_gstin(value):
+    """Upper-cased GSTIN without spaces, or None when it is not a valid GSTIN"""
+    if not value:
+        return None
+    gstin = re.sub(r'\s', '', value).upper()
+    return gstin if GSTIN_RE.match(gstin) else None
+
+
+def phone_prefix_range(value):
+    """(lower, upper) bounds matching every stored phone that starts with the
+    digits typed so far, as an index-friendly range instead of LIKE.
+    """
+    digits = re.sub(r'\D', '', value or '')
+    if len(digits) < 3:
+        return None
+    if len(digits) > 10 and digits.startswith(DEFAULT_COUNTRY_CODE):
+        digits = digits[2:]
+    prefix = f'+{DEFAULT_COUNTRY_CODE}{digits.lstrip("0")}'
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
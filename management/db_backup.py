@@ -0,0 +1,215 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+
+SNAPSHOT_GLOB = 'db-*.sqlite3*'
+
+
+class BackupError(Exception):
+    pass
+
+
+@dataclass
+class BackupReport:
+    path: Path
+    pages: int
+    steps: int
+    restarts: int
+    duration: float
+    max_lock_hold: float
+    max_writer_stall: float = None
+
+
+class _StallProbe(threading.Thread):
+    """Measures how long a writer waits for the database while a backup runs.
+
+    Takes and immediately drops an EXCLUSIVE lock in a loop - what a
+    committing writer needs - without changing the database (a change by
+    another connection would restart the backup). Intrusive: while it waits
+    it holds a PENDING lock that blocks new readers, so the stall it reports
+    is partly its own. A diagnostic for test copies, not for the live file.
+    """
+
+    def __init__(self, path, interval=0.01):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.max_stall = 0.0
+        self.stopped = threading.Event()
+
+    def run(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            while not self.stopped.wait(self.interval):
+                started = time.perf_counter()
+                conn.execute('BEGIN EXCLUSIVE')
+                conn.execute('ROLLBACK')
+                self.max_stall = max(self.max_stall, time.perf_counter() - started)
+        finally:
+            conn.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def backup_root():
+    return Path(settings.BACKUP_ROOT)
+
+
+def database_path():
+    db = settings.DATABASES['default']
+    if db['ENGINE'] != 'django.db.backends.sqlite3':
+        raise BackupError('backup_db only supports the SQLite backend')
+    return Path(db['NAME'])
+
+
+def integrity_check(path):
+    conn = sqlite3.connect(path)
+    try:
+        result = [row[0] for row in conn.execute('PRAGMA integrity_check')]
+    finally:
+        conn.close()
+    return None if result == ['ok'] else '; '.join(result)
+
+
+class _Restarted(Exception):
+    pass
+
+
+def copy_database(source, target, pages=64, pause=0.05, probe=False, max_restarts=3):
+    """Online copy of ``source`` into ``target`` with the SQLite backup API.
+
+    Copies ``pages`` pages per step and sleeps ``pause`` seconds between
+    steps, so the source is only read-locked for short moments and writers
+    get in between. A write from another connection makes SQLite restart
+    the copy; after ``max_restarts`` restarts the step size grows, trading
+    slightly longer locks for finishing while the shop is busy (the last
+    resort is one step).
+
+    Lock hold is measured passively: each step is timed from the end of the
+    previous pause to its progress callback, which is how long the source
+    stayed read-locked. Returns (pages, steps, restarts, max_lock_hold,
+    max_writer_stall); the stall is only measured with ``probe``.
+    """
+    stats = {'pages': 0, 'steps': 0, 'restarts': 0, 'max_lock_hold': 0.0}
+    state = {}
+
+    def progress(status, remaining, total):
+        stats['max_lock_hold'] = max(stats['max_lock_hold'], time.perf_counter() - state['step_started'])
+        stats['steps'] += 1
+        stats['pages'] = total
+        if remaining > state['remaining']:
+            stats['restarts'] += 1
+            state['budget'] -= 1
+            if state['budget'] < 0:
+                raise _Restarted
+        state['remaining'] = remaining
+        if remaining:
+            time.sleep(pause)
+        state['step_started'] = time.perf_counter()
+
+    stall_probe = _StallProbe(source) if probe else None
+    src = sqlite3.connect(source, timeout=30)
+    dst = sqlite3.connect(target)
+    try:
+        if stall_probe:
+            stall_probe.start()
+        step = pages
+        while True:
+            state.update(remaining=float('inf'), budget=max_restarts, step_started=time.perf_counter())
+            try:
+                src.backup(dst, pages=step, progress=progress)
+                break
+            except _Restarted:
+                step = -1 if step < 0 or step * 4 > 16384 else step * 4
+    finally:
+        if stall_probe:
+            stall_probe.stop()
+        dst.close()
+        src.close()
+    return (stats['pages'], stats['steps'], stats['restarts'], stats['max_lock_hold'],
+            stall_probe.max_stall if stall_probe else None)
+
+
+def take_snapshot(source=None, root=None, pages=64, pause=0.05, probe=False):
+    """Write a verified snapshot ``db-YYYYmmdd-HHMMSS-ffffff.sqlite3`` into ``root``.
+
+    Never replaces an existing snapshot: a backup and a restore's safety
+    snapshot taken in the same instant fail instead of one overwriting the other.
+    """
+    source = Path(source or database_path())
+    root = Path(root or backup_root())
+    root.mkdir(parents=True, exist_ok=True)
+    final = root / f'db-{timezone.now():%Y%m%d-%H%M%S-%f}.sqlite3'
+    # Private work file, so concurrent runs never write into the same one
+    fd, partial = tempfile.mkstemp(dir=root, prefix=f'{final.name}.', suffix='.partial')
+    os.close(fd)
+    partial = Path(partial)
+
+    started = time.perf_counter()
+    try:
+        page_count, steps, restarts, lock_hold, stall = copy_database(source, partial, pages, pause, probe)
+        problem = integrity_check(partial)
+        if problem:
+            raise BackupError(f'Snapshot failed integrity_check: {problem}')
+        try:
+            # Unlike rename, link() refuses to replace an existing file
+            os.link(partial, final)
+        except FileExistsError:
+            raise BackupError(f'Snapshot {final.name} already exists')
+    finally:
+        partial.unlink(missing_ok=True)
+    return BackupReport(final, page_count, steps, restarts, time.perf_counter() - started, lock_hold, stall)
+
+
+def snapshots(root=None):
+    """Snapshots newest first (the timestamped names sort chronologically)"""
+    root = Path(root or backup_root())
+    return sorted((p for p in root.glob(SNAPSHOT_GLOB) if not p.name.endswith('.partial')), reverse=True)
+
+
+def rotate(root=None, keep_plain=1, keep_total=14):
+    """Gzip all but the newest ``keep_plain`` snapshots, delete beyond ``keep_total``"""
+    compressed, removed = [], []
+    for index, path in enumerate(snapshots(root)):
+        if index >= keep_total:
+            path.unlink()
+            removed.append(path)
+        elif index >= keep_plain and path.suffix == '.sqlite3':
+            target = path.with_name(path.name + '.gz')
+            with open(path, 'rb') as plain, gzip.open(target, 'wb') as packed:
+                shutil.copyfileobj(plain, packed)
+            path.unlink()
+            compressed.append(target)
+    return compressed, removed
+
+
+def restore(snapshot, target=None, pages=64, pause=0.0):
+    """Copy a (possibly gzipped) snapshot back over the live database.
+
+    Goes through the backup API as well, so SQLite's locking protects
+    connections that have the database open.
+    """
+    snapshot = Path(snapshot)
+    target = Path(target or database_path())
+    with tempfile.TemporaryDirectory() as tmp:
+        source = snapshot
+        if snapshot.suffix == '.gz':
+            source = Path(tmp) / snapshot.stem
+            with gzip.open(snapshot, 'rb') as packed, open(source, 'wb') as plain:
+                shutil.copyfileobj(packed, plain)
+        problem = integrity_check(source)
+        if problem:
+            raise BackupError(f'{snapshot.name} failed integrity_check: {problem}')
+        return copy_database(source, target, pages, pause)
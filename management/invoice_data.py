@@ -0,0 +1,115 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+
+PAISA = Decimal('0.01')
+
+
+def to_paisa(amount):
+    """Round an amount to paisa, half-up, the way it is printed"""
+    return Decimal(amount).quantize(PAISA, rounding=ROUND_HALF_UP)
+
+
+def money(amount):
+    """Format an amount the way the printed invoice does: 12,345.00"""
+    return f'{amount:,.2f}'
+
+
+def number_to_words(num):
+    """Convert number to Indian words format"""
+    ones = ['', 'One', 'Two', 'Three', 'Four', 'Five', 'Six', 'Seven', 'Eight', 'Nine']
+    teens = ['Ten', 'Eleven', 'Twelve', 'Thirteen', 'Fourteen', 'Fifteen', 'Sixteen', 'Seventeen', 'Eighteen', 'Nineteen']
+    tens = ['', '', 'Twenty', 'Thirty', 'Forty', 'Fifty', 'Sixty', 'Seventy', 'Eighty', 'Ninety']
+    
+    def convert_below_thousand(n):
+        if n == 0:
+            return ''
+        elif n < 10:
+            return ones[n]
+        elif n < 20:
+            return teens[n - 10]
+        elif n < 100:
+            return tens[n // 10] + (' ' + ones[n % 10] if n % 10 != 0 else '')
+        else:
+            return ones[n // 100] + ' Hundred' + (' ' + convert_below_thousand(n % 100) if n % 100 != 0 else '')
+    
+    if num == 0:
+        return 'Zero'
+    
+    n = int(num)
+    crores = n // 10000000
+    n %= 10000000
+    lakhs = n // 100000
+    n %= 100000
+    thousands = n // 1000
+    n %= 1000
+    
+    words = ''
+    if crores > 0:
+        words += convert_below_thousand(crores) + ' Crore '
+    if lakhs > 0:
+        words += convert_below_thousand(lakhs) + ' Lakh '
+    if thousands > 0:
+        words += convert_below_thousand(thousands) + ' Thousand '
+    if n > 0:
+        words += convert_below_thousand(n)
+    
+    return words.strip()
+
+
+class InvoiceData:
+    """Every figure printed on an invoice, computed once.
+
+    The PDF, the HTML preview and the receipt are all rendered from this, so
+    their items, taxes, round-off and amount in words cannot drift apart.
+    ``items`` defaults to the invoice's saved items; the admin preview passes
+    unsaved ones. Printed amounts are rounded to paisa here, once, so no
+    renderer applies its own rounding.
+    """
+
+    def __init__(self, invoice, items=None):
+        self.invoice = invoice
+        self.items = list(invoice.items.all()) if items is None else list(items)
+        self.cgst_rate = invoice.cgst_rate or Decimal('0')
+        self.sgst_rate = invoice.sgst_rate or Decimal('0')
+
+        self.rows = [
+            {
+                'sno': sno,
+                'description': f'{item.mobile.name} {item.mobile.model}' if item.mobile_id else '',
+                'hsn_code': item.hsn_code,
+                'quantity': item.quantity or 0,
+                'rate': to_paisa(item.rate or 0),
+                'amount': to_paisa(item.amount),
+            }
+            for sno, item in enumerate(self.items, 1)
+        ]
+        self.quantity_total = sum(row['quantity'] for row in self.rows)
+
+        subtotal = sum((row['amount'] for row in self.rows), Decimal('0'))
+        cgst = (subtotal * self.cgst_rate) / 100
+        sgst = (subtotal * self.sgst_rate) / 100
+        # Same arithmetic as Invoice.get_grand_total()/get_roundoff()
+        total = subtotal + cgst + sgst
+        self.round_off = Decimal(round(total) - total).quantize(PAISA)
+        self.grand_total = to_paisa(total + self.round_off)
+        self.amount_in_words = number_to_words(int(total))
+        self.subtotal = to_paisa(subtotal)
+        self.cgst = to_paisa(cgst)
+        self.sgst = to_paisa(sgst)
+        self.total_tax = self.cgst + self.sgst
+
+        # HSN-wise tax summary, in order of first appearance
+        hsn_subtotals = {}
+        for row in self.rows:
+            hsn_subtotals[row['hsn_code']] = hsn_subtotals.get(row['hsn_code'], Decimal('0')) + row['amount']
+        self.hsn_summary = []
+        for hsn, taxable in hsn_subtotals.items():
+            cgst = to_paisa((taxable * self.cgst_rate) / 100)
+            sgst = to_paisa((taxable * self.sgst_rate) / 100)
+            self.hsn_summary.append({
+                'hsn_code': hsn,
+                'taxable': taxable,
+                'cgst': cgst,
+                'sgst': sgst,
+                'total_tax': cgst + sgst,
+            })
@@ -0,0 +1,115 @@
+import copy
+import threading
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Paragraph
+from reportlab.platypus.flowables import Flowable
+
+
+class CachedFlowable(Flowable):
+    """A static flowable that is parsed once and wrapped once per thread, then reused.
+
+    Every document draws the same pre-laid-out copy, so only the variable
+    parts of an invoice pay for paragraph parsing and line breaking.
+    ReportLab mutates a flowable while wrapping/drawing it, so each thread
+    keeps its own copy rather than taking turns on a shared one.
+    """
+
+    def __init__(self, flowable):
+        super().__init__()
+        self.flowable = flowable
+        self._local = threading.local()
+
+    def _laid_out(self, availWidth, availHeight):
+        local = self._local
+        if getattr(local, 'avail_width', None) != availWidth:
+            local.flowable = copy.deepcopy(self.flowable)
+            local.size = local.flowable.wrap(availWidth, availHeight)
+            local.avail_width = availWidth
+        return local
+
+    def wrap(self, availWidth, availHeight):
+        return self._laid_out(availWidth, availHeight).size
+
+    def wrapOn(self, canv, aW, aH):
+        # Flowable.wrapOn would set and delete ``self.canv`` on this shared
+        # instance (Table wraps its cells this way)
+        return self.wrap(aW, aH)
+
+    def splitOn(self, canv, aW, aH):
+        return self._laid_out(aW, aH).flowable.splitOn(canv, aW, aH)
+
+    def getSpaceBefore(self):
+        return self.flowable.getSpaceBefore()
+
+    def getSpaceAfter(self):
+        return self.flowable.getSpaceAfter()
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        # Overridden rather than draw() so this shared instance never holds a
+        # per-document canvas in ``self.canv``; always wrapped first
+        self._local.flowable.drawOn(canvas, x, y, _sW)
+
+
+class Letterhead:
+    """The static parts of a tax invoice for one company profile"""
+
+    def __init__(self, company_name, company_address, company_gstin, company_state, company_state_code):
+        styles = getSampleStyleSheet()
+        self.title = CachedFlowable(Paragraph('Tax Invoice', ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=14,
+            textColor=colors.black,
+            spaceAfter=8,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        )))
+        self.company = CachedFlowable(Paragraph(
+            f'<b>{company_name}</b><br/>'
+            f'{company_address}<br/>'
+            f'GSTIN/UIN: {company_gstin}<br/>'
+            f'State Name - {company_state}, Code : {company_state_code}',
+            ParagraphStyle('CompanyStyle', parent=styles['Normal'], fontSize=8, leading=10)
+        ))
+        self.other_info = CachedFlowable(Paragraph(
+            f'<b>Supplier\'s Ref.</b><br/><br/>'
+            f'<b>Other Reference(s)</b><br/><br/>'
+            f'<b>Buyer\'s Order No.</b><br/><br/>'
+            f'<b>Dispatch Document No.</b><br/>',
+            ParagraphStyle('OtherInfo', parent=styles['Normal'], fontSize=8, leading=10)
+        ))
+        self.declaration = CachedFlowable(Paragraph(
+            '<b>Declaration:</b><br/>'
+            'We declare that this invoice shows the actual price of the goods described and that all particulars are true and correct.',
+            ParagraphStyle('DeclarationStyle', parent=styles['Normal'], fontSize=8, leading=10)
+        ))
+        self.signatory = CachedFlowable(Paragraph(
+            f'<b>for {company_name}</b><br/><br/><br/>'
+            '<b>Authorised Signatory</b>',
+            ParagraphStyle('SignatureStyle', parent=styles['Normal'], fontSize=8, leading=12, alignment=TA_CENTER)
+        ))
+        self.footer = CachedFlowable(Paragraph(
+            'This is a Computer Generated Invoice',
+            ParagraphStyle('FooterStyle', parent=styles['Normal'], fontSize=7, alignment=TA_CENTER, textColor=colors.grey)
+        ))
+
+
+@lru_cache(maxsize=16)
+def get_letterhead(company_name, company_address, company_gstin, company_state, company_state_code):
+    """Letterhead for a company profile; editing any field yields a new cache key"""
+    return Letterhead(company_name, company_address, company_gstin, company_state, company_state_code)
+
+
+def letterhead_for(invoice):
+    store = invoice.store
+    return get_letterhead(
+        store.company_name,
+        store.company_address,
+        store.company_gstin,
+        store.company_state,
+        store.company_state_code,
+    )
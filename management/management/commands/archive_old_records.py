@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from management.cold_archive import archive_old_records
+
+
+class Command(BaseCommand):
+    help = 'Move sold mobiles and closed invoices older than COLD_ARCHIVE_AFTER_DAYS into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Age in days (default: settings.COLD_ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be moved')
+
+    def handle(self, *args, **options):
+        counts = archive_old_records(options['days'], options['batch_size'], options['dry_run'])
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {counts['invoices']} invoice(s) and {counts['mobiles']} mobile(s)"
+        ))
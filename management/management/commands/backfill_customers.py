@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from management.models import Customer, Invoice, Mobile
+
+
+class Command(BaseCommand):
+    help = 'Link existing mobiles and invoices to the customer index, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        mobiles = self.backfill(
+            Mobile.objects.filter(customer__isnull=True, customer_number__isnull=False).exclude(customer_number=''),
+            batch_size, lambda mobile: Customer.resolve(mobile.customer_name, phone=mobile.customer_number),
+        )
+        invoices = self.backfill(
+            Invoice.objects.filter(customer__isnull=True).exclude(buyer_gstin=''),
+            batch_size, lambda invoice: Customer.resolve(invoice.buyer_name, gstin=invoice.buyer_gstin),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Linked {mobiles} mobile(s) and {invoices} invoice(s); {Customer.objects.count()} customer(s) indexed'
+        ))
+
+    def backfill(self, queryset, batch_size, resolve):
+        """Walk ``queryset`` by primary key, one short transaction per batch.
+
+        Rows are updated with bulk_update so save() side effects (stock
+        ledger, invoice numbering) are not replayed.
+        """
+        linked, last_pk = 0, 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+            if not batch:
+                return linked
+            last_pk = batch[-1].pk
+            with transaction.atomic():
+                changed = []
+                for obj in batch:
+                    obj.customer = resolve(obj)
+                    if obj.customer is not None:
+                        changed.append(obj)
+                queryset.model.objects.bulk_update(changed, ['customer'])
+            linked += len(changed)
+            self.stdout.write(f'  {queryset.model._meta.verbose_name_plural}: {linked} linked (up to id {last_pk})')
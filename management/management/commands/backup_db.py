@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from management.db_backup import BackupError, restore, rotate, snapshots, take_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Online SQLite snapshot (safe while the shop is open), with rotation, verification and restore'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=64, help='Pages copied per step')
+        parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between steps')
+        parser.add_argument('--probe', action='store_true',
+                            help='Also measure writer stalls with a lock probe (blocks readers; not on the live database)')
+        parser.add_argument('--keep-plain', type=int, default=1, help='Newest snapshots left uncompressed')
+        parser.add_argument('--keep', type=int, default=14, help='Snapshots kept in total')
+        parser.add_argument('--list', action='store_true', help='List snapshots and exit')
+        parser.add_argument('--restore', metavar='SNAPSHOT', help="Restore a snapshot file (or 'latest')")
+        parser.add_argument('--no-input', action='store_false', dest='interactive', help='Do not ask for confirmation')
+
+    def handle(self, *args, **options):
+        try:
+            if options['list']:
+                for path in snapshots():
+                    self.stdout.write(f'{path.name}  {path.stat().st_size / 1024:,.0f} KiB')
+            elif options['restore']:
+                self.restore(options['restore'], options)
+            else:
+                self.backup(options)
+        except BackupError as exc:
+            raise CommandError(exc)
+
+    def backup(self, options):
+        report = take_snapshot(pages=options['pages'], pause=options['pause'], probe=options['probe'])
+        stall = '' if report.max_writer_stall is None else f', max writer stall {report.max_writer_stall * 1000:.1f} ms'
+        self.stdout.write(self.style.SUCCESS(
+            f'{report.path.name}: {report.pages} pages in {report.steps} steps ({report.restarts} restarts), '
+            f'{report.duration:.2f}s, longest lock {report.max_lock_hold * 1000:.1f} ms{stall}, integrity ok'
+        ))
+        compressed, removed = rotate(keep_plain=options['keep_plain'], keep_total=options['keep'])
+        if compressed or removed:
+            self.stdout.write(f'Rotation: {len(compressed)} compressed, {len(removed)} removed')
+
+    def restore(self, name, options):
+        available = snapshots()
+        if name == 'latest':
+            if not available:
+                raise CommandError('No snapshots to restore')
+            path = available[0]
+        else:
+            path = next((p for p in available if p.name == name or str(p) == name), None)
+            if path is None:
+                raise CommandError(f'Unknown snapshot: {name}')
+        if options['interactive']:
+            answer = input(f'This replaces the live database with {path.name}. Type "yes" to continue: ')
+            if answer != 'yes':
+                raise CommandError('Restore cancelled')
+        # Keep the current state in case the wrong snapshot was picked
+        safety = take_snapshot(pages=options['pages'], pause=0)
+        restore(path)
+        self.stdout.write(self.style.SUCCESS(f'Restored {path.name} (previous database saved as {safety.path.name})'))
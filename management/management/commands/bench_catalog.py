@@ -0,0 +1,73 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test a running server (e.g. gunicorn project.wsgi vs uvicorn project.asgi:application) '
+        'at several concurrency levels and report throughput and tail latency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', nargs='?', default='http://127.0.0.1:8000/phones/')
+        parser.add_argument('--concurrency', default='1,10,50,200', help='Comma-separated connection counts')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per concurrency level')
+        parser.add_argument('--timeout', type=float, default=10.0, help='Seconds before a request counts as failed')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Only plain http:// URLs are supported')
+        target = (url.hostname, url.port or 80, url.path or '/')
+        self.stdout.write(f"{'conns':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>6}")
+        for concurrency in (int(c) for c in options['concurrency'].split(',')):
+            result = asyncio.run(self.run_level(target, concurrency, options['requests'], options['timeout']))
+            self.stdout.write(
+                f"{concurrency:>6} {result['rps']:>8.0f} {result['p50']:>8.1f} {result['p95']:>8.1f} "
+                f"{result['p99']:>8.1f} {result['max']:>8.1f} {result['errors']:>6}"
+            )
+
+    async def run_level(self, target, concurrency, total, timeout):
+        latencies, errors = [], 0
+        remaining = iter(range(total))
+
+        async def client():
+            nonlocal errors
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    ok = await asyncio.wait_for(self.fetch(*target), timeout)
+                except (OSError, asyncio.TimeoutError):
+                    ok = False
+                if ok:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        if len(latencies) < 2:
+            raise CommandError(f'{errors} of {total} requests failed - is the server running?')
+        cuts = statistics.quantiles(latencies, n=100)
+        return {
+            'rps': len(latencies) / elapsed, 'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98],
+            'max': max(latencies), 'errors': errors,
+        }
+
+    @staticmethod
+    async def fetch(host, port, path):
+        """One request on a fresh connection (sync WSGI workers close it anyway)"""
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+            return status_line.split()[1:2] == [b'200']
+        finally:
+            writer.close()
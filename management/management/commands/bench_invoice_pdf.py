@@ -0,0 +1,60 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from management.invoice_pdf import generate_invoice_pdf
+from management.models import Invoice, InvoiceItem, Mobile, Store
+
+
+class Command(BaseCommand):
+    help = 'Benchmark invoice PDF rendering on a synthetic dataset (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invoices', type=int, default=50, help='Number of invoices to render')
+        parser.add_argument('--items', type=int, default=5, help='Items per invoice')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            invoices = self.build_dataset(options['invoices'], options['items'])
+            timings, sizes = [], []
+            for invoice in invoices:
+                start = time.perf_counter()
+                pdf = generate_invoice_pdf(invoice)
+                timings.append((time.perf_counter() - start) * 1000)
+                sizes.append(len(pdf.getvalue()))
+            transaction.set_rollback(True)
+
+        first = timings[0]
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        self.stdout.write(
+            f'{len(timings)} invoices x {options["items"]} items: '
+            f'first {first:.2f} ms, mean {statistics.mean(timings):.2f} ms, '
+            f'p95 {p95:.2f} ms, mean size {statistics.mean(sizes):.0f} bytes'
+        )
+
+    def build_dataset(self, count, items):
+        store, _ = Store.objects.get_or_create(code='main', defaults={'name': 'Main'})
+        for n in range(count):
+            invoice = Invoice.objects.create(
+                store=store,
+                invoice_number=f'BENCH-{n:05d}',
+                buyer_name=f'Benchmark Buyer {n}',
+                buyer_address='Main Road, Nizamabad',
+                buyer_state='Telangana',
+                buyer_state_code='36',
+            )
+            for i in range(items):
+                mobile = Mobile.objects.create(
+                    store=store, name='Benchmark', model=f'B{n}-{i}', imei_number=f'{990000000000000 + n * 1000 + i}',
+                    purchase_price=Decimal('9000'), selling_price=Decimal('10000'), status='sold',
+                )
+                InvoiceItem.objects.create(invoice=invoice, mobile=mobile, rate=Decimal('10000'))
+        return list(
+            Invoice.objects.filter(invoice_number__startswith='BENCH-').select_related('store')
+            .prefetch_related(Prefetch('items', queryset=InvoiceItem.objects.select_related('mobile')))
+        )
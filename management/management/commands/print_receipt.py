@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+
+from management.models import Invoice, InvoiceItem
+from management.receipt import PAPER_COLUMNS, get_receipt_sink, render_invoice_receipt
+
+
+class Command(BaseCommand):
+    help = 'Print an invoice as a thermal receipt to the configured printer, a file or stdout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('invoice_number')
+        parser.add_argument('--paper', type=int, choices=sorted(PAPER_COLUMNS), default=80, help='Paper width in mm')
+        parser.add_argument('--output', help="Device or file path, '-' for stdout (default: settings.RECEIPT_PRINTER)")
+        parser.add_argument('--text', action='store_true', help='Plain text without ESC/POS control codes')
+
+    def handle(self, *args, **options):
+        try:
+            invoice = Invoice.objects.select_related('store', 'archive').prefetch_related(
+                Prefetch('items', queryset=InvoiceItem.objects.select_related('mobile'))
+            ).get(invoice_number=options['invoice_number'])
+        except Invoice.DoesNotExist:
+            raise CommandError(f"Invoice {options['invoice_number']} does not exist")
+        payload = render_invoice_receipt(invoice, options['paper'], escpos=not options['text'])
+        get_receipt_sink(options['output']).write(payload)
@@ -0,0 +1,72 @@
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from management.repricing import MARKUP, ROUND, SET, RepriceRule, apply, preview
+
+
+class Command(BaseCommand):
+    help = (
+        'Reprice available mobiles by brand/model/stock age: set a price, mark up over purchase price '
+        'or round to a ₹99 ending. Shows the diff; nothing changes without --apply'
+    )
+
+    def add_arguments(self, parser):
+        action = parser.add_mutually_exclusive_group()
+        action.add_argument('--set', type=Decimal, metavar='PRICE', help='New selling price')
+        action.add_argument('--markup', type=Decimal, metavar='PERCENT', help='Selling price = purchase price + PERCENT')
+        action.add_argument('--price-list', metavar='CSV',
+                            help="Distributor price list with brand,model,price columns (one rule per row)")
+        parser.add_argument('--round-99', action='store_true', help='Move prices up to the next ₹99 ending')
+        parser.add_argument('--brand', default='', help='Only this brand (case-insensitive)')
+        parser.add_argument('--model', default='', help='Only this model (case-insensitive)')
+        parser.add_argument('--min-age-days', type=int, help='Only phones in stock for at least this many days')
+        parser.add_argument('--store', default='', help='Only this store code')
+        parser.add_argument('--apply', action='store_true', help='Write the new prices (default: dry run)')
+
+    def handle(self, *args, **options):
+        rules = self.rules(options)
+        rows = list(preview(rules))
+        for row in rows:
+            old = '-' if row['selling_price'] is None else f"{row['selling_price']:.2f}"
+            self.stdout.write(
+                f"{row['imei_number']:<16} {row['name'] + ' ' + row['model']:<30} "
+                f"{old:>10} -> {row['new_price']:>10.2f}  ({rules[row['rule_index']].describe()})"
+            )
+        if not options['apply']:
+            self.stdout.write(self.style.SUCCESS(f'Would reprice {len(rows)} mobile(s); rerun with --apply'))
+            return
+        count = apply(rules)
+        self.stdout.write(self.style.SUCCESS(f'Repriced {count} mobile(s)'))
+
+    def rules(self, options):
+        scope = {
+            'round_99': options['round_99'], 'min_age_days': options['min_age_days'], 'store': options['store'],
+        }
+        if options['price_list']:
+            return self.price_list(options['price_list'], scope)
+        scope.update(brand=options['brand'], model=options['model'])
+        if options['set'] is not None:
+            return [RepriceRule(SET, options['set'], **scope)]
+        if options['markup'] is not None:
+            return [RepriceRule(MARKUP, options['markup'], **scope)]
+        if options['round_99']:
+            return [RepriceRule(ROUND, **scope)]
+        raise CommandError('Give one of --set, --markup, --price-list or --round-99')
+
+    @staticmethod
+    def price_list(path, scope):
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as f:
+                rules = [
+                    RepriceRule(SET, Decimal(row['price'].strip()), brand=row['brand'].strip(),
+                                model=row['model'].strip(), **scope)
+                    for row in csv.DictReader(f)
+                ]
+        except (OSError, KeyError, InvalidOperation) as exc:
+            raise CommandError(f'Cannot read price list {path}: {exc!r}')
+        # A blank brand or model would widen the row to every phone
+        if not rules or not all(rule.brand and rule.model for rule in rules):
+            raise CommandError(f'{path}: every row needs a brand, a model and a price')
+        return rules
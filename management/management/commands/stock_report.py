@@ -0,0 +1,36 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from management.stock_ledger import stock_at, take_checkpoint
+
+
+class Command(BaseCommand):
+    help = 'Stock count and valuation at a point in time (end of day for a date), optionally stored as a checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--at', help='Date (YYYY-MM-DD, end of that day) or ISO datetime; default now')
+        parser.add_argument('--checkpoint', action='store_true', help='Store the result as a checkpoint (run periodically, e.g. nightly)')
+
+    def handle(self, *args, **options):
+        moment = self.parse_moment(options['at']) if options['at'] else timezone.now()
+        if options['checkpoint']:
+            checkpoint = take_checkpoint(moment)
+            quantity, value = checkpoint.quantity, checkpoint.value
+        else:
+            quantity, value = stock_at(moment)
+        self.stdout.write(f'{moment:%Y-%m-%d %H:%M}: {quantity} unit(s) in stock, valued at {value:,.2f}')
+
+    def parse_moment(self, text):
+        try:
+            if len(text) == 10:
+                day = datetime.date.fromisoformat(text)
+                moment = datetime.datetime.combine(day, datetime.time.max)
+            else:
+                moment = datetime.datetime.fromisoformat(text)
+        except ValueError:
+            raise CommandError(f'Invalid --at value: {text}')
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from management.models import InvoiceArchive
+from management.pdf_archive import archive_root, verify
+
+
+class Command(BaseCommand):
+    help = 'Verify size and SHA-256 of every archived invoice PDF and report orphaned blobs'
+
+    def handle(self, *args, **options):
+        problems = 0
+        known = set()
+        for archive in InvoiceArchive.objects.select_related('invoice').iterator(chunk_size=500):
+            known.add(archive.sha256)
+            problem = verify(archive)
+            if problem:
+                problems += 1
+                self.stderr.write(f'Invoice {archive.invoice.invoice_number} ({archive.sha256}): {problem}')
+
+        orphans = [
+            path for path in archive_root().glob('*/*/*.pdf')
+            if path.stem not in known
+        ] if archive_root().exists() else []
+        for path in orphans:
+            self.stdout.write(self.style.WARNING(f'Orphaned blob: {path}'))
+
+        if problems:
+            raise CommandError(f'{problems} archived invoice(s) failed verification')
+        self.stdout.write(self.style.SUCCESS(f'{len(known)} archived invoice(s) verified, {len(orphans)} orphaned blob(s)'))
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-19 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0004_remove_invoice_customer_delete_customer'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['invoice_date', 'invoice_number'], name='invoice_date_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['created_at'], name='invoice_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mobile',
+            index=models.Index(fields=['stock_in_date'], name='mobile_stock_in_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mobile',
+            index=models.Index(fields=['sold_date'], name='mobile_sold_date_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-19 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0005_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(db_index=True, help_text='Content address in the archive store', max_length=64)),
+                ('size', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('invoice', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='archive', to='management.invoice')),
+            ],
+            options={
+                'verbose_name': 'Invoice Archive',
+                'verbose_name_plural': 'Invoice Archives',
+                'ordering': ['-archived_at'],
+            },
+        ),
+    ]
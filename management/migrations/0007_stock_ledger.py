@@ -0,0 +1,71 @@
+# Generated by Django 6.0 on 2026-10-19 17:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_movements(apps, schema_editor):
+    """Seed the ledger from the current stock: a stock-in per mobile, plus a sale if sold"""
+    Mobile = apps.get_model('management', 'Mobile')
+    StockMovement = apps.get_model('management', 'StockMovement')
+    batch = []
+    for mobile in Mobile.objects.order_by('pk').iterator(chunk_size=1000):
+        batch.append(StockMovement(
+            mobile_id=mobile.pk, kind='stock_in', quantity=1,
+            value=mobile.purchase_price, occurred_at=mobile.stock_in_date, note='Backfilled',
+        ))
+        if mobile.status == 'sold':
+            batch.append(StockMovement(
+                mobile_id=mobile.pk, kind='sale', quantity=-1, value=-mobile.purchase_price,
+                occurred_at=mobile.sold_date or mobile.stock_in_date, note='Backfilled',
+            ))
+        if len(batch) >= 1000:
+            StockMovement.objects.bulk_create(batch)
+            batch = []
+    StockMovement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0006_invoicearchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(unique=True)),
+                ('quantity', models.IntegerField()),
+                ('value', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Stock Checkpoint',
+                'verbose_name_plural': 'Stock Checkpoints',
+                'ordering': ['-taken_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('stock_in', 'Stock in'), ('sale', 'Sale'), ('return', 'Return'), ('adjustment', 'Adjustment')], max_length=10)),
+                ('quantity', models.IntegerField(help_text='Signed change in units on hand')),
+                ('value', models.DecimalField(decimal_places=2, help_text='Signed change in stock value at purchase price', max_digits=12)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('note', models.CharField(blank=True, max_length=200)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('mobile', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='movements', to='management.mobile')),
+            ],
+            options={
+                'verbose_name': 'Stock Movement',
+                'verbose_name_plural': 'Stock Movements',
+                'ordering': ['occurred_at', 'id'],
+                'indexes': [models.Index(fields=['occurred_at', 'mobile'], name='movement_occurred_mobile_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_movements, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,161 @@
+# Generated by Django 6.0 on 2026-10-19 18:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+MOBILE_COLUMNS = (
+    'id, name, model, imei_number, purchase_price, selling_price, status, '
+    'stock_in_date, customer_name, customer_number, sold_date'
+)
+
+CREATE_VIEWS = [
+    f"""
+    CREATE VIEW management_mobile_history AS
+    SELECT {MOBILE_COLUMNS}, FALSE AS archived FROM management_mobile
+    UNION ALL
+    SELECT {MOBILE_COLUMNS}, TRUE AS archived FROM management_archivedmobile
+    """,
+    """
+    CREATE VIEW management_invoice_history AS
+    SELECT id, invoice_number, invoice_date, buyer_name, buyer_gstin, is_draft, FALSE AS archived
+    FROM management_invoice
+    UNION ALL
+    SELECT id, invoice_number, invoice_date, buyer_name, buyer_gstin, FALSE AS is_draft, TRUE AS archived
+    FROM management_archivedinvoice
+    """,
+]
+
+DROP_VIEWS = [
+    'DROP VIEW IF EXISTS management_mobile_history',
+    'DROP VIEW IF EXISTS management_invoice_history',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0008_customer_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('invoice_number', models.CharField(max_length=50)),
+                ('invoice_date', models.DateField()),
+                ('buyer_name', models.CharField(max_length=200)),
+                ('buyer_gstin', models.CharField(max_length=15)),
+                ('is_draft', models.BooleanField()),
+                ('archived', models.BooleanField()),
+            ],
+            options={
+                'verbose_name': 'Invoice (all)',
+                'verbose_name_plural': 'Invoices (all, incl. archived)',
+                'db_table': 'management_invoice_history',
+                'ordering': ['-invoice_date', '-invoice_number'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='MobileHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('model', models.CharField(max_length=100)),
+                ('imei_number', models.CharField(max_length=15)),
+                ('purchase_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('selling_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('status', models.CharField(choices=[('available', 'Available'), ('sold', 'Sold')], max_length=10)),
+                ('stock_in_date', models.DateTimeField()),
+                ('customer_name', models.CharField(max_length=100, null=True)),
+                ('customer_number', models.CharField(max_length=15, null=True)),
+                ('sold_date', models.DateTimeField(null=True)),
+                ('archived', models.BooleanField()),
+            ],
+            options={
+                'verbose_name': 'Mobile (all)',
+                'verbose_name_plural': 'Mobiles (all, incl. archived)',
+                'db_table': 'management_mobile_history',
+                'ordering': ['-stock_in_date'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedInvoice',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('invoice_number', models.CharField(max_length=50, unique=True)),
+                ('invoice_date', models.DateField()),
+                ('buyer_name', models.CharField(max_length=200)),
+                ('buyer_address', models.TextField()),
+                ('buyer_state', models.CharField(max_length=50)),
+                ('buyer_state_code', models.CharField(max_length=2)),
+                ('buyer_gstin', models.CharField(max_length=15)),
+                ('company_name', models.CharField(max_length=200)),
+                ('company_address', models.CharField(max_length=300)),
+                ('company_gstin', models.CharField(max_length=15)),
+                ('company_state', models.CharField(max_length=50)),
+                ('company_state_code', models.CharField(max_length=2)),
+                ('cgst_rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('sgst_rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('delivery_note', models.CharField(blank=True, max_length=200)),
+                ('delivery_date', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('sha256', models.CharField(blank=True, help_text='Content address in the archive store', max_length=64)),
+                ('size', models.PositiveIntegerField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_invoices', to='management.customer')),
+            ],
+            options={
+                'verbose_name': 'Archived Invoice',
+                'verbose_name_plural': 'Archived Invoices',
+                'ordering': ['-invoice_date', '-invoice_number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedInvoiceItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('mobile_id', models.BigIntegerField(db_index=True)),
+                ('description', models.CharField(max_length=201)),
+                ('imei_number', models.CharField(max_length=15)),
+                ('hsn_code', models.CharField(max_length=20)),
+                ('quantity', models.IntegerField()),
+                ('rate', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField()),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='management.archivedinvoice')),
+            ],
+            options={
+                'verbose_name': 'Archived Invoice Item',
+                'verbose_name_plural': 'Archived Invoice Items',
+                'ordering': ['invoice', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedMobile',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('model', models.CharField(max_length=100)),
+                ('imei_number', models.CharField(db_index=True, max_length=15)),
+                ('purchase_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('selling_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('status', models.CharField(choices=[('available', 'Available'), ('sold', 'Sold')], max_length=10)),
+                ('stock_in_date', models.DateTimeField()),
+                ('customer_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('customer_number', models.CharField(blank=True, max_length=15, null=True)),
+                ('sold_date', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_mobiles', to='management.customer')),
+            ],
+            options={
+                'verbose_name': 'Archived Mobile',
+                'verbose_name_plural': 'Archived Mobiles',
+                'ordering': ['-sold_date'],
+            },
+        ),
+        migrations.RunSQL(CREATE_VIEWS, DROP_VIEWS),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 6.0 on 2026-10-19 19:30
+
+from importlib import import_module
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Unapplying rebuilds the invoice and mobile tables on SQLite, which fails
+# while the history views from 0009 point at them
+history_views = import_module('management.migrations.0009_cold_archive')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0009_cold_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(history_views.DROP_VIEWS, history_views.CREATE_VIEWS),
+        migrations.CreateModel(
+            name='Store',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Branch name, e.g. Nizamabad', max_length=100)),
+                ('code', models.SlugField(help_text='Short code for the catalog (?store=...)', max_length=20, unique=True)),
+                ('invoice_prefix', models.CharField(blank=True, help_text="Prefix of this branch's invoice numbers, e.g. 'ARM-'", max_length=10, unique=True)),
+                ('company_name', models.CharField(default='Venkateshwara Mobiles Sales & Services', max_length=200)),
+                ('company_address', models.CharField(default='Tilak Garden Complex, Nizamabad', max_length=300)),
+                ('company_gstin', models.CharField(default='36CHEPM3931K1Z5', max_length=15)),
+                ('company_state', models.CharField(default='Telangana', max_length=50)),
+                ('company_state_code', models.CharField(default='36', max_length=2)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('staff', models.ManyToManyField(blank=True, help_text='Staff users who work at this branch', related_name='stores', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Store',
+                'verbose_name_plural': 'Stores',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='store',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='invoices', to='management.store'),
+        ),
+        migrations.AddField(
+            model_name='mobile',
+            name='store',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='mobiles', to='management.store'),
+        ),
+        migrations.CreateModel(
+            name='InvoiceSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('last_number', models.PositiveIntegerField(default=0)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoice_series', to='management.store')),
+            ],
+            options={
+                'verbose_name': 'Invoice Series',
+                'verbose_name_plural': 'Invoice Series',
+                'constraints': [models.UniqueConstraint(fields=('store', 'year'), name='invoiceseries_store_year_uniq')],
+            },
+        ),
+        migrations.RunSQL(history_views.CREATE_VIEWS, history_views.DROP_VIEWS),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 6.0 on 2026-10-19 19:30
+
+from django.conf import settings
+from django.db import migrations, transaction
+
+
+COMPANY_FIELDS = ['company_name', 'company_address', 'company_gstin', 'company_state', 'company_state_code']
+CHUNK = 2000
+
+
+def chunked_update(queryset, **values):
+    """UPDATE in primary-key ranges, one short transaction each"""
+    last = queryset.order_by('-pk').values_list('pk', flat=True).first() or 0
+    for start in range(0, last + 1, CHUNK):
+        with transaction.atomic():
+            queryset.filter(pk__gte=start, pk__lt=start + CHUNK).update(**values)
+
+
+def create_stores(apps, schema_editor):
+    """One store per distinct company profile found on invoices (the shop
+    only ever had one, so normally a single 'main' store), then attach
+    every invoice and mobile to it.
+    """
+    Store = apps.get_model('management', 'Store')
+    Invoice = apps.get_model('management', 'Invoice')
+    Mobile = apps.get_model('management', 'Mobile')
+    InvoiceSeries = apps.get_model('management', 'InvoiceSeries')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    profiles = list(
+        Invoice.objects.values(*COMPANY_FIELDS).distinct().order_by('company_name', 'company_address')
+    ) or [{}]
+    stores = []
+    for n, profile in enumerate(profiles):
+        suffix = '' if n == 0 else f'-{n + 1}'
+        stores.append(Store.objects.create(
+            name='Main' if n == 0 else f'Branch {n + 1}',
+            code=f'main{suffix}',
+            invoice_prefix='' if n == 0 else f'B{n + 1}-',
+            **profile,
+        ))
+        if profile:
+            chunked_update(Invoice.objects.filter(store__isnull=True, **profile), store=stores[-1])
+    main = stores[0]
+    chunked_update(Invoice.objects.filter(store__isnull=True), store=main)
+    # Stock was never tracked per branch: it all belonged to the one shop
+    chunked_update(Mobile.objects.filter(store__isnull=True), store=main)
+
+    # Existing staff keep seeing everything they saw before
+    staff = list(User.objects.filter(is_staff=True))
+    for store in stores:
+        store.staff.add(*staff)
+
+    # Continue the existing 'YYYY-NNNN' numbering in the main store's series
+    last_numbers = {}
+    for number in Invoice.objects.filter(store=main).values_list('invoice_number', flat=True).iterator():
+        year, _, sequence = number.partition('-')
+        if year.isdigit() and sequence.isdigit():
+            last_numbers[int(year)] = max(last_numbers.get(int(year), 0), int(sequence))
+    InvoiceSeries.objects.bulk_create([
+        InvoiceSeries(store=main, year=year, last_number=last) for year, last in last_numbers.items()
+    ])
+
+
+class Migration(migrations.Migration):
+    # Each chunk commits on its own instead of one long write lock
+    atomic = False
+
+    dependencies = [
+        ('management', '0010_store'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_stores, migrations.RunPython.noop),
+    ]
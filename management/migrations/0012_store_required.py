@@ -0,0 +1,74 @@
+# Generated by Django 6.0 on 2026-10-19 19:30
+
+from importlib import import_module
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# SQLite rebuilds the invoice and mobile tables below, which fails while the
+# history views from 0009 point at them - drop the views around the rebuild
+history_views = import_module('management.migrations.0009_cold_archive')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0011_store_backfill'),
+    ]
+
+    operations = [
+        migrations.RunSQL(history_views.DROP_VIEWS, history_views.CREATE_VIEWS),
+        migrations.RemoveField(
+            model_name='invoice',
+            name='company_address',
+        ),
+        migrations.RemoveField(
+            model_name='invoice',
+            name='company_gstin',
+        ),
+        migrations.RemoveField(
+            model_name='invoice',
+            name='company_name',
+        ),
+        migrations.RemoveField(
+            model_name='invoice',
+            name='company_state',
+        ),
+        migrations.RemoveField(
+            model_name='invoice',
+            name='company_state_code',
+        ),
+        migrations.AlterField(
+            model_name='invoice',
+            name='store',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='invoices', to='management.store'),
+        ),
+        migrations.AlterField(
+            model_name='mobile',
+            name='store',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='mobiles', to='management.store'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['store', 'invoice_date', 'invoice_number'], name='invoice_store_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mobile',
+            index=models.Index(fields=['store', 'status', 'stock_in_date'], name='mobile_store_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mobile',
+            index=models.Index(fields=['store', 'sold_date'], name='mobile_store_sold_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedinvoice',
+            name='store',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_invoices', to='management.store'),
+        ),
+        migrations.AddField(
+            model_name='archivedmobile',
+            name='store',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_mobiles', to='management.store'),
+        ),
+        migrations.RunSQL(history_views.CREATE_VIEWS, history_views.DROP_VIEWS),
+    ]
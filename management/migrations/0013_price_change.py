@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-19 18:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0012_store_required'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('new_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('rule', models.CharField(help_text='Repricing rule that set the new price', max_length=200)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('mobile', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='price_changes', to='management.mobile')),
+            ],
+            options={
+                'verbose_name': 'Price Change',
+                'verbose_name_plural': 'Price Changes',
+                'ordering': ['-changed_at', '-id'],
+                'indexes': [models.Index(fields=['mobile', 'changed_at'], name='pricechange_mobile_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-19 20:10
+
+from importlib import import_module
+
+from django.db import migrations
+
+history_views = import_module('management.migrations.0009_cold_archive')
+
+# Same views as 0009, plus the branch, so the history admins can be scoped
+# to the staff member's stores like the hot tables
+CREATE_VIEWS = [
+    f"""
+    CREATE VIEW management_mobile_history AS
+    SELECT {history_views.MOBILE_COLUMNS}, store_id, FALSE AS archived FROM management_mobile
+    UNION ALL
+    SELECT {history_views.MOBILE_COLUMNS}, store_id, TRUE AS archived FROM management_archivedmobile
+    """,
+    """
+    CREATE VIEW management_invoice_history AS
+    SELECT id, invoice_number, invoice_date, buyer_name, buyer_gstin, is_draft, store_id, FALSE AS archived
+    FROM management_invoice
+    UNION ALL
+    SELECT id, invoice_number, invoice_date, buyer_name, buyer_gstin, FALSE AS is_draft, store_id, TRUE AS archived
+    FROM management_archivedinvoice
+    """,
+]
+
+DROP_VIEWS = history_views.DROP_VIEWS
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0013_price_change'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DROP_VIEWS, history_views.CREATE_VIEWS),
+        migrations.RunSQL(CREATE_VIEWS, DROP_VIEWS),
+    ]
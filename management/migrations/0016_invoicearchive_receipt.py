@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0015_invoice_draft_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoicearchive',
+            name='receipt',
+            field=models.JSONField(blank=True, help_text='Receipt figures frozen with the PDF (receipt_snapshot)', null=True),
+        ),
+    ]
@@ -1,15 +1,190 @@
-from django.db import models
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from decimal import Decimal
 
+from .customers import normalize_gstin, normalize_phone
+
 # Create your models here.
 
+class StoreQuerySet(models.QuerySet):
+    def for_user(self, user):
+        """Branches a staff user works at; superusers see every branch"""
+        if user.is_superuser:
+            return self
+        return self.filter(staff=user)
+
+
+class Store(models.Model):
+    """A branch: its own stock, invoice number series and letterhead"""
+    name = models.CharField(max_length=100, help_text="Branch name, e.g. Nizamabad")
+    code = models.SlugField(max_length=20, unique=True, help_text="Short code for the catalog (?store=...)")
+    invoice_prefix = models.CharField(max_length=10, unique=True, blank=True, help_text="Prefix of this branch's invoice numbers, e.g. 'ARM-'")
+    
+    # Letterhead details, printed on every invoice of the branch
+    company_name = models.CharField(max_length=200, default="Venkateshwara Mobiles Sales & Services")
+    company_address = models.CharField(max_length=300, default="Tilak Garden Complex, Nizamabad")
+    company_gstin = models.CharField(max_length=15, default="36CHEPM3931K1Z5")
+    company_state = models.CharField(max_length=50, default="Telangana")
+    company_state_code = models.CharField(max_length=2, default="36")
+    
+    staff = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='stores', help_text="Staff users who work at this branch")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    objects = StoreQuerySet.as_manager()
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Store'
+        verbose_name_plural = 'Stores'
+    
+    def __str__(self):
+        return self.name
+
+
+class InvoiceSeries(models.Model):
+    """Last invoice number issued by a store in a year.
+
+    One row per (store, year), so branches never wait on each other's
+    numbering lock.
+    """
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='invoice_series')
+    year = models.PositiveSmallIntegerField()
+    last_number = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Invoice Series'
+        verbose_name_plural = 'Invoice Series'
+        constraints = [
+            models.UniqueConstraint(fields=['store', 'year'], name='invoiceseries_store_year_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.store} {self.year}: {self.last_number}"
+    
+    @classmethod
+    def next_invoice_number(cls, store, year):
+        """Allocate the next number of the store's series, e.g. 'ARM-2026-0007'"""
+        with transaction.atomic():
+            cls.objects.get_or_create(store=store, year=year)
+            cls.objects.filter(store=store, year=year).update(last_number=F('last_number') + 1)
+            number = cls.objects.filter(store=store, year=year).values_list('last_number', flat=True).get()
+        return f"{store.invoice_prefix}{year}-{number:04d}"
+
+
+class Customer(models.Model):
+    """Normalized customer index over the free-text buyer fields.
+
+    Phone numbers are stored in E.164 form and GSTINs upper-cased, both as
+    unique indexed keys, so a repeat buyer is one exact lookup.
+    """
+    name = models.CharField(max_length=200, blank=True)
+    phone = models.CharField(max_length=16, unique=True, null=True, blank=True, help_text="E.164, e.g. +919848012345")
+    gstin = models.CharField(max_length=15, unique=True, null=True, blank=True, help_text="GSTIN/UIN")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Customer'
+        verbose_name_plural = 'Customers'
+    
+    def __str__(self):
+        return f"{self.name or 'Customer'} ({self.phone or self.gstin or '-'})"
+    
+    def clean(self):
+        errors = {}
+        if self.phone and not normalize_phone(self.phone):
+            errors['phone'] = "Enter a 10-digit mobile number (with or without +91) or an international +number."
+        if self.gstin and not normalize_gstin(self.gstin):
+            errors['gstin'] = "Enter a valid 15-character GSTIN."
+        if errors:
+            raise ValidationError(errors)
+    
+    def save(self, *args, **kwargs):
+        # Invalid keys are kept as typed (clean() rejects them); blanks become NULL for the unique indexes
+        self.phone = normalize_phone(self.phone) or self.phone or None
+        self.gstin = normalize_gstin(self.gstin) or self.gstin or None
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def resolve(cls, name='', phone=None, gstin=None):
+        """Find or create the customer for a phone number and/or GSTIN"""
+        phone, gstin = normalize_phone(phone), normalize_gstin(gstin)
+        if not phone and not gstin:
+            return None
+        customer = None
+        if phone:
+            customer = cls.objects.filter(phone=phone).first()
+        if customer is None and gstin:
+            customer = cls.objects.filter(gstin=gstin).first()
+        if customer is None:
+            try:
+                with transaction.atomic():
+                    return cls.objects.create(name=name or '', phone=phone, gstin=gstin)
+            except IntegrityError:
+                # Created concurrently for the same key (a None key would match every row without one)
+                keys = models.Q()
+                if phone:
+                    keys |= models.Q(phone=phone)
+                if gstin:
+                    keys |= models.Q(gstin=gstin)
+                return cls.objects.filter(keys).first()
+        
+        # Fill in keys and name we learn later, unless another customer owns the key
+        changed = False
+        if phone and not customer.phone and not cls.objects.filter(phone=phone).exists():
+            customer.phone, changed = phone, True
+        if gstin and not customer.gstin and not cls.objects.filter(gstin=gstin).exists():
+            customer.gstin, changed = gstin, True
+        if name and not customer.name:
+            customer.name, changed = name, True
+        if changed:
+            customer.save()
+        return customer
+    
+    def purchase_history(self, stores=None):
+        """Phones bought by this customer, walk-in or on a GST invoice, newest first.
+
+        A single statement over the hot and archived rows (the history view):
+        every branch is a lookup on an indexed foreign key (customer_id, and
+        invoice.customer_id -> item.invoice_id, hot and archived alike).
+        ``stores`` limits it to those branches' sales.
+        """
+        items = InvoiceItem.objects.filter(mobile=models.OuterRef('pk')).order_by('-invoice__invoice_date')
+        archived_items = ArchivedInvoiceItem.objects.filter(mobile_id=models.OuterRef('pk')).order_by('-invoice__invoice_date')
+        mobiles = MobileHistory.objects.filter(
+            models.Q(pk__in=Mobile.objects.filter(customer=self).values('pk'))
+            | models.Q(pk__in=ArchivedMobile.objects.filter(customer=self).values('pk'))
+            | models.Q(pk__in=InvoiceItem.objects.filter(invoice__customer=self).values('mobile_id'))
+            | models.Q(pk__in=ArchivedInvoiceItem.objects.filter(invoice__customer=self).values('mobile_id'))
+        )
+        if stores is not None:
+            mobiles = mobiles.filter(store__in=stores.values('pk'))
+        return mobiles.annotate(
+            invoice_id=Coalesce(
+                models.Subquery(items.values('invoice_id')[:1]),
+                models.Subquery(archived_items.values('invoice_id')[:1]),
+            ),
+            invoice_number=Coalesce(
+                models.Subquery(items.values('invoice__invoice_number')[:1]),
+                models.Subquery(archived_items.values('invoice__invoice_number')[:1]),
+            ),
+        ).order_by(models.F('sold_date').desc(nulls_last=True), '-pk')
+
+
 class Mobile(models.Model):
     STATUS_CHOICES = [
         ('available', 'Available'),
         ('sold', 'Sold'),
     ]
     
+    # Covered by the store-led indexes below
+    store = models.ForeignKey(Store, on_delete=models.PROTECT, related_name='mobiles', db_index=False)
+    
     # Mobile Details
     name = models.CharField(max_length=100, help_text="Brand/Model name")
     model = models.CharField(max_length=100)
@@ -24,23 +199,89 @@ class Mobile(models.Model):
     # Customer Details (filled when sold)
     customer_name = models.CharField(max_length=100, null=True, blank=True)
     customer_number = models.CharField(max_length=15, null=True, blank=True)
+    customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, null=True, blank=True, related_name='mobiles')
     sold_date = models.DateTimeField(null=True, blank=True, help_text="Date sold")
     
     class Meta:
         ordering = ['-stock_in_date']
         verbose_name = 'Mobile'
         verbose_name_plural = 'Mobiles'
+        indexes = [
+            models.Index(fields=['stock_in_date'], name='mobile_stock_in_date_idx'),
+            models.Index(fields=['sold_date'], name='mobile_sold_date_idx'),
+            models.Index(fields=['store', 'status', 'stock_in_date'], name='mobile_store_status_idx'),
+            models.Index(fields=['store', 'sold_date'], name='mobile_store_sold_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} {self.model} - {self.imei_number}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored stock state so save() can tell what changed
+        if 'status' in instance.__dict__ and 'purchase_price' in instance.__dict__:
+            instance._ledger_state = (instance.status, instance.purchase_price)
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """Save and append the matching StockMovement rows in one transaction.
+
+        QuerySet.update() bypasses this - change status through save().
+        """
+        adding = self._state.adding
+        with transaction.atomic(using=kwargs.get('using')):
+            self.sync_customer()
+            previous = None
+            if not adding:
+                previous = getattr(self, '_ledger_state', None) or (
+                    Mobile.objects.filter(pk=self.pk).values_list('status', 'purchase_price').first()
+                )
+            super().save(*args, **kwargs)
+            StockMovement.record_change(self, previous)
+        self._ledger_state = (self.status, self.purchase_price)
+    
+    def sync_customer(self):
+        """Link the customer index from the typed number, or fill the text fields from a picked customer"""
+        if self.customer_number:
+            self.customer = Customer.resolve(self.customer_name, phone=self.customer_number) or self.customer
+        elif self.customer_id:
+            self.customer_name = self.customer_name or self.customer.name
+            self.customer_number = (self.customer.phone or '')[-10:] or None
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            if self.status == 'available':
+                StockMovement.record(self, StockMovement.ADJUSTMENT, -1, -self.purchase_price, note='Deleted from stock')
+            return super().delete(*args, **kwargs)
+    
     def profit(self):
         if self.selling_price and self.status == 'sold':
             return self.selling_price - self.purchase_price
         return None
     profit.short_description = 'Profit'
+
+
+class InvoiceQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate ``_subtotal`` and ``_grand_total`` in one aggregate query"""
+        money = DecimalField(max_digits=12, decimal_places=2)
+        subtotal = Coalesce(
+            Sum(F('items__quantity') * F('items__rate'), output_field=money),
+            Value(Decimal('0')),
+            output_field=money,
+        )
+        grand_total = ExpressionWrapper(
+            F('_subtotal') + F('_subtotal') * (F('cgst_rate') + F('sgst_rate')) / Value(Decimal('100')),
+            output_field=money,
+        )
+        return self.annotate(_subtotal=subtotal).annotate(_grand_total=grand_total)
+
+
 class Invoice(models.Model):
     # Invoice Details
+    # Covered by the store-led index below
+    store = models.ForeignKey(Store, on_delete=models.PROTECT, related_name='invoices', db_index=False)
     invoice_number = models.CharField(max_length=50, unique=True)
     invoice_date = models.DateField(default=timezone.now)
     
@@ -50,13 +291,9 @@ class Invoice(models.Model):
     buyer_state = models.CharField(max_length=50, default="")
     buyer_state_code = models.CharField(max_length=2, default="", help_text="State code e.g., 36 for Telangana")
     buyer_gstin = models.CharField(max_length=15, default="", help_text="GSTIN/UIN")
+    customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, null=True, blank=True, related_name='invoices')
     
-    # Company Details (Fixed for Venkateshwara Mobiles)
-    company_name = models.CharField(max_length=200, default="Venkateshwara Mobiles Sales & Services")
-    company_address = models.CharField(max_length=300, default="Tilak Garden Complex, Nizamabad")
-    company_gstin = models.CharField(max_length=15, default="36CHEPM3931K1Z5")
-    company_state = models.CharField(max_length=50, default="Telangana")
-    company_state_code = models.CharField(max_length=2, default="36")
+    # Company details come from the store (Store.company_*)
     
     # Tax Details
     cgst_rate = models.DecimalField(max_digits=5, decimal_places=2, default=9, help_text="CGST percentage")
@@ -67,19 +304,35 @@ class Invoice(models.Model):
     delivery_date = models.DateField(blank=True, null=True)
     
     # Status
-    is_draft = models.BooleanField(default=False)
+    is_draft = models.BooleanField(default=True, help_text="Editable until finalized; finalized invoices are frozen and read-only")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = InvoiceQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-invoice_date', '-invoice_number']
         verbose_name = 'Invoice'
         verbose_name_plural = 'Invoices'
+        indexes = [
+            models.Index(fields=['invoice_date', 'invoice_number'], name='invoice_date_number_idx'),
+            models.Index(fields=['created_at'], name='invoice_created_at_idx'),
+            models.Index(fields=['store', 'invoice_date', 'invoice_number'], name='invoice_store_date_idx'),
+        ]
     
     def __str__(self):
         buyer = self.buyer_name
         return f"Invoice #{self.invoice_number} - {buyer}"
     
+    def save(self, *args, **kwargs):
+        # Keep the customer index in sync with the buyer snapshot
+        if self.buyer_gstin:
+            self.customer = Customer.resolve(self.buyer_name, gstin=self.buyer_gstin) or self.customer
+        elif self.customer_id:
+            self.buyer_name = self.buyer_name or self.customer.name
+            self.buyer_gstin = self.customer.gstin or ''
+        super().save(*args, **kwargs)
+    
     def get_subtotal(self):
         return sum(item.amount for item in self.items.all())
     
@@ -122,9 +375,283 @@ class InvoiceItem(models.Model):
     def __str__(self):
         return f"{self.invoice.invoice_number} - {self.mobile.name}"
     
+    def clean(self):
+        # A branch can only invoice its own stock
+        try:
+            store_id = self.invoice.store_id
+        except Invoice.DoesNotExist:
+            return
+        if self.mobile_id and store_id and self.mobile.store_id != store_id:
+            raise ValidationError({'mobile': "This phone belongs to another store's stock."})
+    
     @property
     def amount(self):
         # Guard against None when inline rows are empty in admin
         qty = self.quantity or 0
         rate = self.rate or Decimal('0')
         return Decimal(qty) * rate
+
+
+class StockMovement(models.Model):
+    """Append-only stock ledger: one row per change to what is on the shelf.
+
+    ``quantity`` and ``value`` are signed deltas (value at purchase price),
+    so stock on any date is a range sum over ``occurred_at``.
+    """
+    STOCK_IN = 'stock_in'
+    SALE = 'sale'
+    RETURN = 'return'
+    ADJUSTMENT = 'adjustment'
+    KIND_CHOICES = [
+        (STOCK_IN, 'Stock in'),
+        (SALE, 'Sale'),
+        (RETURN, 'Return'),
+        (ADJUSTMENT, 'Adjustment'),
+    ]
+    
+    # No database constraint: the ledger outlives mobiles that are deleted or archived
+    mobile = models.ForeignKey(Mobile, on_delete=models.DO_NOTHING, db_constraint=False, related_name='movements')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    quantity = models.IntegerField(help_text="Signed change in units on hand")
+    value = models.DecimalField(max_digits=12, decimal_places=2, help_text="Signed change in stock value at purchase price")
+    occurred_at = models.DateTimeField(default=timezone.now)
+    note = models.CharField(max_length=200, blank=True)
+    recorded_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['occurred_at', 'id']
+        verbose_name = 'Stock Movement'
+        verbose_name_plural = 'Stock Movements'
+        indexes = [
+            models.Index(fields=['occurred_at', 'mobile'], name='movement_occurred_mobile_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.quantity:+d} - {self.mobile_id}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Stock movements are append-only")
+        super().save(*args, **kwargs)
+        # A backdated movement makes later checkpoints wrong - drop them
+        StockCheckpoint.objects.filter(taken_at__gte=self.occurred_at).delete()
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError("Stock movements are append-only")
+    
+    @classmethod
+    def record(cls, mobile, kind, quantity, value, occurred_at=None, note=''):
+        return cls.objects.create(
+            mobile=mobile, kind=kind, quantity=quantity, value=value,
+            occurred_at=occurred_at or timezone.now(), note=note,
+        )
+    
+    @classmethod
+    def record_change(cls, mobile, previous):
+        """Append movements for a saved Mobile given its previous (status, purchase_price)"""
+        price = mobile.purchase_price
+        if previous is None:
+            cls.record(mobile, cls.STOCK_IN, 1, price, mobile.stock_in_date)
+            if mobile.status == 'sold':
+                cls.record(mobile, cls.SALE, -1, -price, mobile.sold_date)
+            return
+        
+        old_status, old_price = previous
+        if old_status == 'available' and old_price != price:
+            cls.record(mobile, cls.ADJUSTMENT, 0, price - old_price, note='Purchase price changed')
+        if old_status == 'available' and mobile.status == 'sold':
+            cls.record(mobile, cls.SALE, -1, -price, mobile.sold_date)
+        elif old_status == 'sold' and mobile.status == 'available':
+            cls.record(mobile, cls.RETURN, 1, price)
+
+
+class PriceChange(models.Model):
+    """Selling price history, written in bulk by the repricing tool (repricing.py)"""
+    # No database constraint, like the stock ledger: history outlives archived mobiles
+    mobile = models.ForeignKey(Mobile, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                               related_name='price_changes')
+    old_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    new_price = models.DecimalField(max_digits=10, decimal_places=2)
+    rule = models.CharField(max_length=200, help_text="Repricing rule that set the new price")
+    changed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='+')
+    changed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-changed_at', '-id']
+        verbose_name = 'Price Change'
+        verbose_name_plural = 'Price Changes'
+        indexes = [
+            models.Index(fields=['mobile', 'changed_at'], name='pricechange_mobile_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.mobile_id}: {self.old_price} -> {self.new_price}"
+
+
+class StockCheckpoint(models.Model):
+    """Stock on hand at a moment, so point-in-time queries only sum later movements"""
+    taken_at = models.DateTimeField(unique=True)
+    quantity = models.IntegerField()
+    value = models.DecimalField(max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-taken_at']
+        verbose_name = 'Stock Checkpoint'
+        verbose_name_plural = 'Stock Checkpoints'
+    
+    def __str__(self):
+        return f"{self.taken_at:%Y-%m-%d %H:%M} - {self.quantity} units"
+
+
+class InvoiceArchive(models.Model):
+    """The frozen PDF of a finalized invoice (bytes live in the archive store)"""
+    invoice = models.OneToOneField(Invoice, on_delete=models.PROTECT, related_name='archive')
+    sha256 = models.CharField(max_length=64, db_index=True, help_text="Content address in the archive store")
+    size = models.PositiveIntegerField()
+    receipt = models.JSONField(null=True, blank=True, help_text="Receipt figures frozen with the PDF (receipt_snapshot)")
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-archived_at']
+        verbose_name = 'Invoice Archive'
+        verbose_name_plural = 'Invoice Archives'
+    
+    def __str__(self):
+        return f"{self.invoice_id} - {self.sha256[:12]}"
+
+
+# Cold storage: sold stock and closed invoices past COLD_ARCHIVE_AFTER_DAYS are
+# moved here by archive_old_records, keeping their primary keys, so the hot
+# tables only hold what day-to-day screens query.
+
+class ArchivedMobile(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    store = models.ForeignKey(Store, on_delete=models.SET_NULL, null=True, related_name='archived_mobiles')
+    name = models.CharField(max_length=100)
+    model = models.CharField(max_length=100)
+    imei_number = models.CharField(max_length=15, db_index=True)
+    purchase_price = models.DecimalField(max_digits=10, decimal_places=2)
+    selling_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=Mobile.STATUS_CHOICES)
+    stock_in_date = models.DateTimeField()
+    customer_name = models.CharField(max_length=100, null=True, blank=True)
+    customer_number = models.CharField(max_length=15, null=True, blank=True)
+    customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_mobiles')
+    sold_date = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-sold_date']
+        verbose_name = 'Archived Mobile'
+        verbose_name_plural = 'Archived Mobiles'
+    
+    def __str__(self):
+        return f"{self.name} {self.model} - {self.imei_number}"
+
+
+class ArchivedInvoice(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    store = models.ForeignKey(Store, on_delete=models.SET_NULL, null=True, related_name='archived_invoices')
+    invoice_number = models.CharField(max_length=50, unique=True)
+    invoice_date = models.DateField()
+    buyer_name = models.CharField(max_length=200)
+    buyer_address = models.TextField()
+    buyer_state = models.CharField(max_length=50)
+    buyer_state_code = models.CharField(max_length=2)
+    buyer_gstin = models.CharField(max_length=15)
+    customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_invoices')
+    company_name = models.CharField(max_length=200)
+    company_address = models.CharField(max_length=300)
+    company_gstin = models.CharField(max_length=15)
+    company_state = models.CharField(max_length=50)
+    company_state_code = models.CharField(max_length=2)
+    cgst_rate = models.DecimalField(max_digits=5, decimal_places=2)
+    sgst_rate = models.DecimalField(max_digits=5, decimal_places=2)
+    delivery_note = models.CharField(max_length=200, blank=True)
+    delivery_date = models.DateField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    # The frozen PDF (InvoiceArchive) is carried over; the blob stays in the store
+    sha256 = models.CharField(max_length=64, blank=True, help_text="Content address in the archive store")
+    size = models.PositiveIntegerField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-invoice_date', '-invoice_number']
+        verbose_name = 'Archived Invoice'
+        verbose_name_plural = 'Archived Invoices'
+    
+    def __str__(self):
+        return f"Invoice #{self.invoice_number} - {self.buyer_name}"
+
+
+class ArchivedInvoiceItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    invoice = models.ForeignKey(ArchivedInvoice, on_delete=models.CASCADE, related_name='items')
+    # Plain id: the mobile may still be hot (e.g. returned and back in stock)
+    mobile_id = models.BigIntegerField(db_index=True)
+    description = models.CharField(max_length=201)
+    imei_number = models.CharField(max_length=15)
+    hsn_code = models.CharField(max_length=20)
+    quantity = models.IntegerField()
+    rate = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['invoice', 'id']
+        verbose_name = 'Archived Invoice Item'
+        verbose_name_plural = 'Archived Invoice Items'
+    
+    def __str__(self):
+        return f"{self.invoice.invoice_number} - {self.description}"
+
+
+class MobileHistory(models.Model):
+    """Read-only view over hot and archived mobiles (database view, see migrations 0009 and 0014)"""
+    id = models.BigIntegerField(primary_key=True)
+    store = models.ForeignKey(Store, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    name = models.CharField(max_length=100)
+    model = models.CharField(max_length=100)
+    imei_number = models.CharField(max_length=15)
+    purchase_price = models.DecimalField(max_digits=10, decimal_places=2)
+    selling_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    status = models.CharField(max_length=10, choices=Mobile.STATUS_CHOICES)
+    stock_in_date = models.DateTimeField()
+    customer_name = models.CharField(max_length=100, null=True)
+    customer_number = models.CharField(max_length=15, null=True)
+    sold_date = models.DateTimeField(null=True)
+    archived = models.BooleanField()
+    
+    class Meta:
+        managed = False
+        db_table = 'management_mobile_history'
+        ordering = ['-stock_in_date']
+        verbose_name = 'Mobile (all)'
+        verbose_name_plural = 'Mobiles (all, incl. archived)'
+    
+    def __str__(self):
+        return f"{self.name} {self.model} - {self.imei_number}"
+
+
+class InvoiceHistory(models.Model):
+    """Read-only view over hot and archived invoices (database view, see migrations 0009 and 0014)"""
+    id = models.BigIntegerField(primary_key=True)
+    store = models.ForeignKey(Store, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    invoice_number = models.CharField(max_length=50)
+    invoice_date = models.DateField()
+    buyer_name = models.CharField(max_length=200)
+    buyer_gstin = models.CharField(max_length=15)
+    is_draft = models.BooleanField()
+    archived = models.BooleanField()
+    
+    class Meta:
+        managed = False
+        db_table = 'management_invoice_history'
+        ordering = ['-invoice_date', '-invoice_number']
+        verbose_name = 'Invoice (all)'
+        verbose_name_plural = 'Invoices (all, incl. archived)'
+    
+    def __str__(self):
+        return f"Invoice #{self.invoice_number} - {self.buyer_name}"
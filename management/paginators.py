@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using='default'):
+    """Planner statistics row count for a table, or None when unavailable.
+
+    SQLite keeps it in ``sqlite_stat1`` once ``ANALYZE`` has run (the first
+    number of any index entry is the table's row count); PostgreSQL keeps it
+    in ``pg_class.reltuples``.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that skips ``COUNT(*)`` on large unfiltered tables.
+
+    When the queryset has no WHERE clause and the planner estimate is above
+    ``settings.ESTIMATED_COUNT_THRESHOLD`` the estimate is used; filtered
+    changelists and small tables still get an exact count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where:
+            threshold = getattr(settings, 'ESTIMATED_COUNT_THRESHOLD', 10000)
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > threshold:
+                return estimate
+        return super().count
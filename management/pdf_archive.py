@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+
+from .invoice_data import InvoiceData
+from .models import InvoiceArchive, InvoiceItem
+from .profiling import StageTimer
+from .receipt import receipt_snapshot
+
+
+logger = logging.getLogger(__name__)
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def archive_root():
+    return Path(settings.INVOICE_ARCHIVE_ROOT)
+
+
+def path_for(digest):
+    """Sharded location of a blob: <root>/ab/cd/abcd....pdf"""
+    return archive_root() / digest[:2] / digest[2:4] / f'{digest}.pdf'
+
+
+def store(data):
+    """Write PDF bytes into the content-addressed store and return the SHA-256.
+
+    Blobs are written to a temporary file, fsynced and renamed into place,
+    then made read-only, so a blob is either absent or complete.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    path = path_for(digest)
+    if path.exists():
+        return digest
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.chmod(tmp_path, 0o444)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return digest
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as blob:
+        for chunk in iter(lambda: blob.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def verify(archive):
+    """Return None when the archived blob is intact, else a problem description"""
+    path = path_for(archive.sha256)
+    if not path.exists():
+        return 'missing'
+    if path.stat().st_size != archive.size:
+        return f'size {path.stat().st_size} != {archive.size}'
+    if file_digest(path) != archive.sha256:
+        return 'checksum mismatch'
+    return None
+
+
+def archive_invoice(invoice, timer=None):
+    """Freeze a finalized invoice's PDF; returns the existing archive if any.
+
+    ``timer`` is an optional ``StageTimer`` that gets the PDF stages of a
+    first print plus the ``archive_store`` write.
+    """
+    if invoice.is_draft:
+        raise ValueError(f'Invoice {invoice.invoice_number} is a draft and cannot be archived')
+    try:
+        # Free when the caller loaded the invoice with select_related('archive')
+        return invoice.archive
+    except InvoiceArchive.DoesNotExist:
+        pass
+
+    # Imported here: ReportLab is only loaded by processes that render PDFs
+    from .invoice_pdf import generate_invoice_pdf
+
+    prefetch_related_objects([invoice], Prefetch('items', queryset=InvoiceItem.objects.select_related('mobile')))
+    figures = InvoiceData(invoice)
+    timer = timer or StageTimer()
+    timer.lap('data_load')
+    data = generate_invoice_pdf(invoice, timer=timer, data=figures).getvalue()
+    digest = store(data)
+    timer.lap('archive_store')
+    try:
+        with transaction.atomic():
+            return InvoiceArchive.objects.create(invoice=invoice, sha256=digest, size=len(data),
+                                                 receipt=receipt_snapshot(invoice, figures))
+    except IntegrityError:
+        # Archived concurrently by another request - the first one wins
+        return InvoiceArchive.objects.get(invoice=invoice)
+
+
+def finalize_invoice(invoice):
+    """The explicit finalize step: mark a draft final and freeze its PDF.
+
+    From here on the invoice is read-only in the admin.
+    """
+    if invoice.is_draft:
+        invoice.is_draft = False
+        invoice.save(update_fields=['is_draft', 'updated_at'])
+    return archive_invoice(invoice)
+
+
+class _RangeFile:
+    """File wrapper that stops reading after ``length`` bytes"""
+
+    def __init__(self, blob, length):
+        self.blob = blob
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.blob.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.blob.close()
+
+
+def serve_archive(request, archive, filename):
+    """Stream an archived PDF; whole-file responses go through FileResponse
+    (and so the server's sendfile path), single byte ranges get a 206.
+    """
+    etag = f'"{archive.sha256}"'
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified(headers={'ETag': etag})
+
+    try:
+        blob = open(path_for(archive.sha256), 'rb')
+    except FileNotFoundError:
+        # Never re-render: today's data would not be the copy that was issued
+        logger.error('archived PDF missing: %s sha256=%s', filename, archive.sha256)
+        raise Http404('The archived PDF of this invoice is missing')
+    size = archive.size
+    match = _RANGE_RE.match(request.headers.get('Range', ''))
+    if match and any(match.groups()):
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+        if start > end or start >= size:
+            blob.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        blob.seek(start)
+        response = FileResponse(_RangeFile(blob, end - start + 1), status=206, content_type='application/pdf')
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        response = FileResponse(blob, content_type='application/pdf')
+
+    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
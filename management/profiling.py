@@ -0,0 +1,134 @@
+import cProfile
+import logging
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.utils.deprecation import MiddlewareMixin
+
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimer:
+    """Lap timer for named stages of a request (e.g. the PDF pipeline).
+
+    Each ``lap(name)`` records the time elapsed since the previous lap, so
+    stages can be marked inline without restructuring the code being timed.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self._last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.stages.append((name, now - self._last))
+        self._last = now
+
+    def server_timing(self):
+        """Value for the ``Server-Timing`` response header (milliseconds)"""
+        return ', '.join(f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.stages)
+
+
+class _Sampler(threading.Thread):
+    """Samples another thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self):
+        """Brendan Gregg's folded-stack format (flamegraph.pl, speedscope)"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class ProfilerMiddleware(MiddlewareMixin):
+    """Profile a single request for staff users.
+
+    Add ``?profile=folded`` (sampling profiler, folded stacks for flamegraphs)
+    or ``?profile=cprofile`` (a ``.prof`` file for snakeviz/flameprof) to any
+    URL, or send the same value in an ``X-Profile`` header. The profile is
+    returned instead of the page, with stage timings recorded through
+    ``request.stage_timer`` in the ``Server-Timing`` header.
+
+    Runs under WSGI and ASGI (MiddlewareMixin), but only profiles sync
+    views: an async view's coroutine runs on the event loop, not on the
+    thread being profiled, so ``?profile=`` on one is refused with a 400.
+    Profile the sync catalog views under WSGI instead.
+    """
+
+    MODES = ('folded', 'cprofile')
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        mode = request.GET.get('profile') or request.headers.get('X-Profile')
+        user = getattr(request, 'user', None)
+        if not mode or user is None or not user.is_staff:
+            return None
+        if mode not in self.MODES:
+            mode = 'folded'
+        if iscoroutinefunction(view_func):
+            return HttpResponseBadRequest(
+                'Async views cannot be profiled: they run on the event loop, not in the profiled thread. '
+                'Profile the sync view instead (serve without ASYNC_CATALOG_VIEWS).',
+                content_type='text/plain; charset=utf-8',
+            )
+
+        request.stage_timer = StageTimer()
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            response = profiler.runcall(self._run_view, request, view_func, view_args, view_kwargs)
+            profiler.create_stats()
+            body = marshal.dumps(profiler.stats)
+            content_type, extension = 'application/octet-stream', 'prof'
+        else:
+            interval = getattr(settings, 'PROFILE_SAMPLE_INTERVAL', 0.001)
+            sampler = _Sampler(threading.get_ident(), interval)
+            sampler.start()
+            try:
+                response = self._run_view(request, view_func, view_args, view_kwargs)
+            finally:
+                sampler.stop()
+            body = sampler.collapsed()
+            content_type, extension = 'text/plain; charset=utf-8', 'folded'
+
+        logger.info('profiled %s %s status=%s stages=%s', request.method, request.path,
+                    response.status_code, request.stage_timer.server_timing())
+        profile = HttpResponse(body, content_type=content_type)
+        name = request.path.strip('/').replace('/', '_') or 'index'
+        profile['Content-Disposition'] = f'attachment; filename="profile-{name}.{extension}"'
+        profile['Server-Timing'] = request.stage_timer.server_timing()
+        profile['X-Profiled-Status'] = str(response.status_code)
+        return profile
+
+    @staticmethod
+    def _run_view(request, view_func, view_args, view_kwargs):
+        response = view_func(request, *view_args, **view_kwargs)
+        # Template responses (admin, generic views) render lazily - include it
+        if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+            response = response.render()
+        return response
@@ -0,0 +1,63 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_vary_headers
+
+
+def public_page(view):
+    """Mark a catalog view as safe to serve without session, auth, messages or CSRF"""
+    view.public_page = True
+    return view
+
+
+class PublicSiteMiddleware:
+    """Fast path for anonymous visitors of the public catalog.
+
+    A GET for a ``public_page`` view without a session cookie is dispatched
+    straight to the view, skipping the middleware below this one (sessions,
+    CSRF, auth, messages, profiling). Anyone with a session cookie - staff -
+    goes through the full stack. Sits above SessionMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def public_view(self, request):
+        if request.method not in ('GET', 'HEAD') or settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if not getattr(match.func, 'public_page', False):
+            return None
+        # ALLOWED_HOSTS is otherwise enforced by CommonMiddleware
+        request.get_host()
+        request.resolver_match = match
+        request.user = AnonymousUser()
+        return match
+
+    @staticmethod
+    def finish(response):
+        # The page differs once a session cookie is sent
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        match = self.public_view(request)
+        if match is None or iscoroutinefunction(match.func):
+            return self.get_response(request)
+        return self.finish(match.func(request, *match.args, **match.kwargs))
+
+    async def __acall__(self, request):
+        match = self.public_view(request)
+        if match is None or not iscoroutinefunction(match.func):
+            return await self.get_response(request)
+        return self.finish(await match.func(request, *match.args, **match.kwargs))
@@ -0,0 +1,115 @@
+import json
+import logging
+import re
+import traceback
+from collections import Counter
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+# Literals and variable-length IN lists are folded so that the same query
+# issued for different rows collapses onto a single "shape".
+_IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised (in tests) when a block runs more queries than it declared"""
+
+
+def sql_shape(sql):
+    """Normalize SQL so repeated per-row queries compare equal"""
+    shape = _STRING_RE.sub('?', sql)
+    shape = _IN_LIST_RE.sub('(%s...)', shape)
+    shape = _NUMBER_RE.sub('?', shape)
+    return ' '.join(shape.split())
+
+
+def _stack():
+    """Project frames only - Django and stdlib frames are noise here"""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir) and __file__ != frame.filename
+    ]
+    return [f'{frame.filename}:{frame.lineno} in {frame.name}' for frame in frames]
+
+
+class query_budget(ContextDecorator):
+    """Declare the maximum number of queries a view, admin method or block may run.
+
+    Usable as ``@query_budget(5)`` or ``with query_budget(5):``. Besides the
+    total, any SQL shape executed more than ``max_repeats`` times is reported
+    as an N+1. Violations raise ``QueryBudgetExceeded`` when
+    ``settings.QUERY_BUDGET_RAISE`` is true (as the test runner sets it) and are logged
+    as a structured warning otherwise.
+    """
+
+    def __init__(self, max_queries, max_repeats=3, using='default', label=None):
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+        self.using = using
+        self.label = label
+
+    def __call__(self, func):
+        if self.label is None:
+            self.label = f'{func.__module__}.{func.__qualname__}'
+        return super().__call__(func)
+
+    def _recreate_cm(self):
+        # Fresh counters for every call when used as a decorator
+        return type(self)(self.max_queries, self.max_repeats, self.using, self.label)
+
+    def __enter__(self):
+        self.count = 0
+        self.shapes = Counter()
+        self.offenders = {}
+        self._wrapper_cm = connections[self.using].execute_wrapper(self._record)
+        self._wrapper_cm.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._wrapper_cm.__exit__(exc_type, exc, tb)
+        if exc_type is None:
+            self.check()
+        return False
+
+    def _record(self, execute, sql, params, many, context):
+        self.count += 1
+        shape = sql_shape(sql)
+        self.shapes[shape] += 1
+        if self.shapes[shape] == self.max_repeats + 1:
+            self.offenders[shape] = _stack()
+        if self.count == self.max_queries + 1:
+            self.offenders.setdefault('<budget>', _stack())
+        return execute(sql, params, many, context)
+
+    @property
+    def repeated(self):
+        return {shape: n for shape, n in self.shapes.items() if n > self.max_repeats}
+
+    def report(self):
+        return {
+            'label': self.label,
+            'queries': self.count,
+            'max_queries': self.max_queries,
+            'max_repeats': self.max_repeats,
+            'repeated': [
+                {'sql': shape, 'count': n, 'stack': self.offenders.get(shape, [])}
+                for shape, n in self.repeated.items()
+            ],
+            'stack': self.offenders.get('<budget>', []),
+        }
+
+    def check(self):
+        if self.count <= self.max_queries and not self.repeated:
+            return
+        report = self.report()
+        if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+            raise QueryBudgetExceeded(json.dumps(report, indent=2))
+        logger.warning('query_budget_exceeded %s', json.dumps(report), extra={'query_budget': report})
@@ -0,0 +1,174 @@
+import sys
+import textwrap
+from decimal import Decimal
+
+from django.conf import settings
+
+from .invoice_data import InvoiceData, money
+
+
+# Characters per line in the printers' default font A
+PAPER_COLUMNS = {58: 32, 80: 48}
+
+# ESC/POS control sequences
+ESC_INIT = b'\x1b@'
+ESC_ALIGN_LEFT = b'\x1ba\x00'
+ESC_ALIGN_CENTER = b'\x1ba\x01'
+ESC_BOLD_ON = b'\x1bE\x01'
+ESC_BOLD_OFF = b'\x1bE\x00'
+GS_FEED_AND_CUT = b'\x1dVB\x03'
+
+
+class _Receipt:
+    """Line buffer that emits ESC/POS bytes or plain text"""
+
+    def __init__(self, columns, escpos):
+        self.columns = columns
+        self.escpos = escpos
+        self.out = [ESC_INIT] if escpos else []
+
+    def command(self, code):
+        if self.escpos:
+            self.out.append(code)
+
+    def line(self, text=''):
+        self.out.append(text[:self.columns].encode('ascii', 'replace') + b'\n')
+
+    def center(self, text, bold=False):
+        if self.escpos:
+            self.command(ESC_ALIGN_CENTER)
+            if bold:
+                self.command(ESC_BOLD_ON)
+            self.line(text)
+            if bold:
+                self.command(ESC_BOLD_OFF)
+            self.command(ESC_ALIGN_LEFT)
+        else:
+            self.line(text.center(self.columns).rstrip())
+
+    def wrapped(self, text):
+        for part in textwrap.wrap(text, self.columns) or ['']:
+            self.line(part)
+
+    def pair(self, label, value):
+        """Label on the left, amount right-aligned"""
+        self.line(label[:self.columns - len(value) - 1].ljust(self.columns - len(value)) + value)
+
+    def rule(self, char='-'):
+        self.line(char * self.columns)
+
+    def bytes(self):
+        if self.escpos:
+            self.out.append(b'\n\n' + GS_FEED_AND_CUT)
+        return b''.join(self.out)
+
+
+def receipt_snapshot(invoice, data=None):
+    """Everything a receipt prints, as JSON-safe values.
+
+    Figures come from ``InvoiceData``, the same model the PDF uses. Stored
+    with the archive when an invoice is finalized, so later edits to the
+    store's letterhead or a phone's name do not change its receipt.
+    """
+    data = data or InvoiceData(invoice)
+    store = invoice.store
+    return {
+        'company_name': store.company_name,
+        'company_address': store.company_address,
+        'company_gstin': store.company_gstin,
+        'invoice_number': invoice.invoice_number,
+        'invoice_date': invoice.invoice_date.strftime('%d-%m-%Y'),
+        'buyer_name': invoice.buyer_name,
+        'buyer_gstin': invoice.buyer_gstin,
+        'cgst_rate': str(invoice.cgst_rate),
+        'sgst_rate': str(invoice.sgst_rate),
+        'rows': [
+            {**row, 'rate': str(row['rate']), 'amount': str(row['amount'])}
+            for row in data.rows
+        ],
+        'subtotal': str(data.subtotal),
+        'cgst': str(data.cgst),
+        'sgst': str(data.sgst),
+        'round_off': str(data.round_off),
+        'grand_total': str(data.grand_total),
+        'quantity_total': data.quantity_total,
+        'amount_in_words': data.amount_in_words,
+    }
+
+
+def render_receipt(invoice, paper_mm=80, escpos=True, data=None):
+    """Render a walk-in sale receipt for 58/80mm thermal printers from live data"""
+    return render_snapshot(receipt_snapshot(invoice, data), paper_mm, escpos)
+
+
+def render_invoice_receipt(invoice, paper_mm=80, escpos=True):
+    """Finalized invoices print the snapshot frozen with their archive; drafts print live data"""
+    archive = getattr(invoice, 'archive', None)
+    if archive is not None and archive.receipt:
+        return render_snapshot(archive.receipt, paper_mm, escpos)
+    return render_receipt(invoice, paper_mm, escpos)
+
+
+def render_snapshot(snapshot, paper_mm=80, escpos=True):
+    """Render a ``receipt_snapshot()``.
+
+    Returns ESC/POS bytes, or plain ASCII text when ``escpos`` is false.
+    """
+    receipt = _Receipt(PAPER_COLUMNS[paper_mm], escpos)
+
+    for part in textwrap.wrap(snapshot['company_name'], receipt.columns):
+        receipt.center(part, bold=True)
+    for part in textwrap.wrap(snapshot['company_address'], receipt.columns):
+        receipt.center(part)
+    receipt.center(f"GSTIN: {snapshot['company_gstin']}")
+    receipt.center('TAX INVOICE', bold=True)
+    receipt.rule()
+    receipt.pair(f"No: {snapshot['invoice_number']}", snapshot['invoice_date'])
+    if snapshot['buyer_name']:
+        receipt.line(f"Buyer: {snapshot['buyer_name']}")
+    if snapshot['buyer_gstin']:
+        receipt.line(f"GSTIN: {snapshot['buyer_gstin']}")
+    receipt.rule()
+
+    for row in snapshot['rows']:
+        receipt.wrapped(f"{row['sno']}. {row['description']} (HSN {row['hsn_code']})")
+        receipt.pair(f"   {row['quantity']} x {money(Decimal(row['rate']))}", money(Decimal(row['amount'])))
+    receipt.rule()
+
+    receipt.pair('Taxable value', money(Decimal(snapshot['subtotal'])))
+    receipt.pair(f"CGST @ {snapshot['cgst_rate']}%", money(Decimal(snapshot['cgst'])))
+    receipt.pair(f"SGST @ {snapshot['sgst_rate']}%", money(Decimal(snapshot['sgst'])))
+    receipt.pair('Round off', money(Decimal(snapshot['round_off'])))
+    receipt.rule('=')
+    receipt.command(ESC_BOLD_ON)
+    receipt.pair(f"TOTAL ({snapshot['quantity_total']} nos)", f"Rs.{money(Decimal(snapshot['grand_total']))}")
+    receipt.command(ESC_BOLD_OFF)
+    receipt.rule('=')
+    receipt.wrapped(f"INR {snapshot['amount_in_words']} Only")
+    receipt.line()
+    receipt.center('Thank you! Visit again')
+    receipt.center('Computer generated receipt')
+    return receipt.bytes()
+
+
+class FileSink:
+    """Writes receipts to a file or printer device node (e.g. /dev/usb/lp0)"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, payload):
+        with open(self.path, 'ab') as device:
+            device.write(payload)
+
+
+class StdoutSink:
+    def write(self, payload):
+        sys.stdout.buffer.write(payload)
+        sys.stdout.buffer.flush()
+
+
+def get_receipt_sink(target=None):
+    """``-`` for stdout, else a path; defaults to ``settings.RECEIPT_PRINTER``"""
+    target = target or getattr(settings, 'RECEIPT_PRINTER', '-')
+    return StdoutSink() if target == '-' else FileSink(target)
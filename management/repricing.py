@@ -0,0 +1,139 @@
+import datetime
+from dataclasses import dataclass, field
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, FloatField, IntegerField, Q, Value, When
+from django.db.models.functions import Cast, Ceil, Round
+from django.utils import timezone
+
+from .models import Mobile, PriceChange
+
+
+PRICE = DecimalField(max_digits=10, decimal_places=2)
+
+SET = 'set'
+MARKUP = 'markup'
+ROUND = 'round'
+MODES = [
+    (SET, 'Set price'),
+    (MARKUP, 'Markup % over purchase price'),
+    (ROUND, 'Round current price to a ₹99 ending'),
+]
+
+
+@dataclass
+class RepriceRule:
+    """Which in-stock mobiles to reprice, and how.
+
+    ``mode`` is 'set' (``value`` is the new price), 'markup' (``value`` is a
+    percentage over purchase_price) or 'round' (the current selling price);
+    with ``round_99`` (implied by 'round') the result moves up to the next
+    price ending in 99.
+    Every filter is optional; ``ids`` limits the rule to an admin selection.
+    """
+    mode: str
+    value: Decimal = None
+    round_99: bool = False
+    brand: str = ''
+    model: str = ''
+    min_age_days: int = None
+    store: str = ''
+    ids: list = field(default=None, repr=False)
+
+    def condition(self, now):
+        q = Q(status='available')
+        if self.brand:
+            q &= Q(name__iexact=self.brand)
+        if self.model:
+            q &= Q(model__iexact=self.model)
+        if self.min_age_days is not None:
+            q &= Q(stock_in_date__lte=now - datetime.timedelta(days=self.min_age_days))
+        if self.store:
+            q &= Q(store__code=self.store)
+        if self.ids is not None:
+            q &= Q(pk__in=self.ids)
+        return q
+
+    def price(self):
+        if self.mode == SET:
+            price = Value(Decimal(self.value), output_field=PRICE)
+        elif self.mode == MARKUP:
+            factor = 1 + Decimal(self.value) / 100
+            price = Round(ExpressionWrapper(F('purchase_price') * Value(factor), output_field=PRICE), 2)
+        elif self.mode == ROUND:
+            price = F('selling_price')
+        else:
+            raise ValueError(f'Unknown repricing mode: {self.mode}')
+        if self.round_99 or self.mode == ROUND:
+            # Smallest price >= the computed one that ends in 99: 11200 -> 11299, 11299 -> 11299
+            # (as float: SQLite stores whole prices as integers and would divide them as such)
+            price = Cast(Ceil((Cast(price, FloatField()) + 1) / 100) * 100 - 1, PRICE)
+        return price
+
+    def describe(self):
+        action = {SET: f'set {self.value}', MARKUP: f'markup {self.value}%', ROUND: 'round'}[self.mode]
+        if self.round_99 or self.mode == ROUND:
+            action += ' to 99'
+        scope = [f'{name}={value}' for name, value in (
+            ('brand', self.brand), ('model', self.model), ('age>=', self.min_age_days), ('store', self.store),
+        ) if value not in ('', None)]
+        if self.ids is not None:
+            scope.append(f'{len(self.ids)} selected')
+        return ' '.join([action, *scope])[:200]
+
+
+def new_price(rules, now):
+    """CASE expression with the price each rule gives, first matching rule wins"""
+    return Case(
+        *[When(rule.condition(now), then=rule.price()) for rule in rules],
+        default=F('selling_price'), output_field=PRICE,
+    )
+
+
+def repriced(rules, now):
+    """Available mobiles whose price the rules change, annotated with ``new_price``.
+
+    The diff is computed by the database, as is the update in apply().
+    """
+    conditions = [rule.condition(now) for rule in rules]
+    rule_index = Case(
+        *[When(condition, then=Value(index)) for index, condition in enumerate(conditions)],
+        output_field=IntegerField(),
+    )
+    return (
+        Mobile.objects.filter(reduce(or_, conditions))
+        .annotate(new_price=new_price(rules, now), rule_index=rule_index)
+        .filter(new_price__isnull=False)
+        .filter(Q(selling_price__isnull=True) | ~Q(selling_price=F('new_price')))
+    )
+
+
+def preview(rules, now=None):
+    """Dry-run diff: one dict per mobile whose price would change"""
+    return repriced(rules, now or timezone.now()).order_by('name', 'model', 'pk').values(
+        'pk', 'name', 'model', 'imei_number', 'purchase_price', 'selling_price', 'new_price', 'rule_index',
+    )
+
+
+def apply(rules, user=None, now=None):
+    """Reprice in one transaction: price history in bulk, then a single UPDATE; returns the count"""
+    now = now or timezone.now()
+    with transaction.atomic():
+        changes = list(
+            repriced(rules, now).select_for_update(of=('self',)).values_list('pk', 'selling_price', 'new_price', 'rule_index')
+        )
+        if not changes:
+            return 0
+        PriceChange.objects.bulk_create([
+            PriceChange(mobile_id=pk, old_price=old, new_price=new, rule=rules[index].describe(),
+                        changed_by=user, changed_at=now)
+            for pk, old, new, index in changes
+        ], batch_size=500)
+        # Same WHERE and CASE as the read above, so the same rows change
+        updated = repriced(rules, now).update(selling_price=new_price(rules, now))
+        if updated != len(changes):
+            raise RuntimeError(f'Repricing matched {len(changes)} mobiles but updated {updated}')
+    return updated
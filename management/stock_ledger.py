@@ -0,0 +1,36 @@
+from decimal import Decimal
+
+from django.db.models import Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import StockCheckpoint, StockMovement
+
+
+def stock_at(moment=None):
+    """(units, value at purchase price) on hand at ``moment``.
+
+    Starts from the latest checkpoint at or before ``moment`` and adds one
+    range aggregate over the movements after it.
+    """
+    moment = moment or timezone.now()
+    checkpoint = StockCheckpoint.objects.filter(taken_at__lte=moment).first()
+    movements = StockMovement.objects.filter(occurred_at__lte=moment)
+    quantity, value = 0, Decimal('0')
+    if checkpoint:
+        movements = movements.filter(occurred_at__gt=checkpoint.taken_at)
+        quantity, value = checkpoint.quantity, checkpoint.value
+    totals = movements.aggregate(
+        quantity=Coalesce(Sum('quantity'), Value(0)),
+        value=Coalesce(Sum('value'), Value(Decimal('0'))),
+    )
+    return quantity + totals['quantity'], value + totals['value']
+
+
+def take_checkpoint(moment=None):
+    moment = moment or timezone.now()
+    quantity, value = stock_at(moment)
+    checkpoint, _ = StockCheckpoint.objects.update_or_create(
+        taken_at=moment, defaults={'quantity': quantity, 'value': value},
+    )
+    return checkpoint
@@ -0,0 +1,8 @@
+from django import template
+
+from management.invoice_data import money
+
+
+register = template.Library()
+
+register.filter('money', money)
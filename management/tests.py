@@ -1,3 +1,798 @@
-from django.test import TestCase
+import base64
+import datetime
+import hashlib
+import importlib
+import io
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from itertools import count
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches
+from django.utils import timezone
+
+from project import urls as project_urls
+
+from . import async_views
+from .cold_archive import archive_old_records
+from .customers import normalize_gstin, normalize_phone
+from .db_backup import BackupError, restore, rotate, snapshots, take_snapshot
+from .invoice_data import InvoiceData
+from .letterhead import letterhead_for
+from .models import (
+    ArchivedInvoice, ArchivedMobile, Customer, Invoice, InvoiceArchive, InvoiceHistory, InvoiceItem, Mobile,
+    InvoiceSeries, MobileHistory, PriceChange, StockCheckpoint, Store,
+)
+from .paginators import EstimatedCountPaginator
+from .pdf_archive import archive_invoice, finalize_invoice, path_for
+from .query_budget import QueryBudgetExceeded, query_budget, sql_shape
+from .receipt import render_receipt
+from .repricing import MARKUP, ROUND, SET, RepriceRule, apply as apply_repricing, preview as preview_repricing
+from .stock_ledger import stock_at, take_checkpoint
+
+
+_imei = count()
+
+
+def main_store():
+    return Store.objects.get_or_create(code='main', defaults={'name': 'Main'})[0]
+
+
+def make_invoice(items=3, **kwargs):
+    kwargs.setdefault('store', main_store())
+    kwargs.setdefault('is_draft', False)
+    invoice = Invoice.objects.create(invoice_number=kwargs.pop('invoice_number', '2026-0001'), buyer_name='Ravi', **kwargs)
+    for i in range(items):
+        mobile = Mobile.objects.create(
+            store=invoice.store, name='Samsung', model=f'M{i}', imei_number=f'{350000000000000 + next(_imei)}',
+            purchase_price=Decimal('9000'), selling_price=Decimal('10000'),
+        )
+        InvoiceItem.objects.create(invoice=invoice, mobile=mobile, rate=Decimal('10000'),
+                                   hsn_code='85171300' if i % 2 else '85176290')
+    return invoice
+
+
+class QueryBudgetTests(TestCase):
+    def test_shape_folds_literals_and_in_lists(self):
+        self.assertEqual(
+            sql_shape('SELECT * FROM t WHERE id IN (%s, %s) LIMIT 21'),
+            sql_shape('SELECT * FROM t WHERE id IN (%s) LIMIT 1'),
+        )
+
+    def test_repeated_shape_raises(self):
+        invoice = make_invoice(items=5)
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(100):
+                [str(item) for item in InvoiceItem.objects.filter(invoice=invoice)]
+
+    def test_total_budget_raises(self):
+        make_invoice(items=1)
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                Mobile.objects.count()
+                Invoice.objects.count()
+
+    def test_print_invoice_stays_within_budget(self):
+        invoice = make_invoice(items=5, is_draft=True)
+        response = self.client.get(f'/invoices/{invoice.id}/print/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+
+class ProfilerMiddlewareTests(TestCase):
+    def setUp(self):
+        self.invoice = make_invoice(items=2, is_draft=True)
+        self.staff = User.objects.create_user('clerk', password='x', is_staff=True)
+
+    def test_anonymous_users_get_the_pdf(self):
+        response = self.client.get(f'/invoices/{self.invoice.id}/print/?profile=folded')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+    def test_staff_profile_reports_pdf_stages(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(f'/invoices/{self.invoice.id}/print/', HTTP_X_PROFILE='cprofile')
+        self.assertEqual(response['X-Profiled-Status'], '200')
+        stages = [part.split(';')[0] for part in response['Server-Timing'].split(', ')]
+        self.assertEqual(stages, ['data_load', 'header', 'buyer', 'items', 'tax_summary', 'declaration', 'doc_build'])
+
+    def test_first_print_of_a_finalized_invoice_reports_pdf_stages(self):
+        self.invoice.is_draft = False
+        self.invoice.save()
+        self.client.force_login(self.staff)
+        response = self.client.get(f'/invoices/{self.invoice.id}/print/?profile=cprofile')
+        stages = [part.split(';')[0] for part in response['Server-Timing'].split(', ')]
+        self.assertEqual(stages, ['data_load', 'header', 'buyer', 'items', 'tax_summary', 'declaration',
+                                  'doc_build', 'archive_store', 'archive_open'])
+
+        response = self.client.get(f'/invoices/{self.invoice.id}/print/?profile=cprofile')
+        self.assertEqual(response['Server-Timing'].split(';')[0], 'archive_open')
+
+
+class ChangelistTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_superuser('owner', password='x')
+        self.client.force_login(admin)
+        for n in range(1, 31):
+            make_invoice(items=2, invoice_number=f'2026-{n:04d}')
+
+    def test_invoice_changelist_is_bounded_and_sortable_by_total(self):
+        for order in ('', '?o=3', '?o=-4'):
+            response = self.client.get(f'/admin/management/invoice/{order}')
+            self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '₹ 23600.00')
+
+    def test_mobile_changelist_is_bounded(self):
+        response = self.client.get('/admin/management/mobile/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_estimated_count_on_analyzed_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        with self.settings(ESTIMATED_COUNT_THRESHOLD=10):
+            paginator = EstimatedCountPaginator(Mobile.objects.all(), 20)
+            with self.assertNumQueries(2):
+                self.assertEqual(paginator.count, 60)
+            filtered = EstimatedCountPaginator(Mobile.objects.filter(model='M0'), 20)
+            self.assertEqual(filtered.count, 30)
+
+    def test_delete_action_on_annotated_queryset(self):
+        ids = list(Invoice.objects.values_list('id', flat=True)[:2])
+        InvoiceItem.objects.filter(invoice_id__in=ids).delete()
+        self.client.post('/admin/management/invoice/', {
+            'action': 'delete_selected', '_selected_action': ids, 'post': 'yes',
+        })
+        self.assertEqual(Invoice.objects.count(), 28)
+
+
+class LetterheadTests(TestCase):
+    def test_letterhead_is_cached_per_company_profile(self):
+        invoice = make_invoice(items=1)
+        self.assertIs(letterhead_for(invoice), letterhead_for(Invoice.objects.get(pk=invoice.pk)))
+        invoice.store.company_address = 'Station Road, Nizamabad'
+        self.assertIsNot(letterhead_for(invoice), letterhead_for(Invoice.objects.get(pk=invoice.pk)))
+
+    def test_shared_flowables_survive_concurrent_renders(self):
+        from reportlab.pdfgen.canvas import Canvas
+        from .invoice_pdf import generate_invoice_pdf
+        invoice = Invoice(invoice_number='T-1', buyer_name='Ravi', store=Store(company_name='Threaded'))
+        company = letterhead_for(invoice).company
+        # Table wraps cells with wrapOn(); it must not touch the shared instance's canvas
+        company.canv = marker = object()
+        company.wrapOn(Canvas(io.BytesIO()), 180, 800)
+        self.assertIs(company.canv, marker)
+        del company.canv
+
+        def render(_):
+            pdf = generate_invoice_pdf(invoice, data=InvoiceData(invoice, items=[])).getvalue()
+            # Everything but the timestamps and document ID
+            return re.sub(rb'/(CreationDate|ModDate) \(D:[^)]*\)|/ID\s*\[.*?\]', b'', pdf, flags=re.S)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            self.assertEqual(set(pool.map(render, range(40))), {render(None)})
+
+
+class InvoiceArchiveTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = self.settings(INVOICE_ARCHIVE_ROOT=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.invoice = make_invoice(items=2)
+
+    def test_finalized_invoice_is_frozen(self):
+        url = f'/invoices/{self.invoice.id}/print/'
+        first = b''.join(self.client.get(url).streaming_content)
+        archive = InvoiceArchive.objects.get(invoice=self.invoice)
+        self.assertEqual(hashlib.sha256(first).hexdigest(), archive.sha256)
+        self.assertTrue(path_for(archive.sha256).exists())
+
+        Mobile.objects.update(name='Renamed')
+        second = self.client.get(url)
+        self.assertEqual(b''.join(second.streaming_content), first)
+        self.assertEqual(second['ETag'], f'"{archive.sha256}"')
+
+    def test_range_request(self):
+        url = f'/invoices/{self.invoice.id}/print/'
+        response = self.client.get(url, HTTP_RANGE='bytes=0-7')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4')
+        size = InvoiceArchive.objects.get(invoice=self.invoice).size
+        self.assertEqual(response['Content-Range'], f'bytes 0-7/{size}')
+        self.assertEqual(self.client.get(url, HTTP_RANGE=f'bytes={size}-').status_code, 416)
+
+    def test_drafts_render_live(self):
+        draft = make_invoice(items=1, invoice_number='2026-0002', is_draft=True)
+        response = self.client.get(f'/invoices/{draft.id}/print/')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertFalse(InvoiceArchive.objects.filter(invoice=draft).exists())
+
+    def test_missing_blob_is_logged_and_404(self):
+        archive = archive_invoice(self.invoice)
+        path_for(archive.sha256).unlink()
+        with self.assertLogs('management.pdf_archive', 'ERROR'):
+            response = self.client.get(f'/invoices/{self.invoice.id}/print/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_invoices_lock_only_once_finalized(self):
+        self.assertTrue(Invoice().is_draft)
+        draft = make_invoice(items=1, invoice_number='2026-0002', is_draft=True)
+        self.client.force_login(User.objects.create_superuser('owner', password='x'))
+        url = f'/admin/management/invoice/{draft.pk}/change/'
+        self.assertTrue(self.client.get(url).context['has_change_permission'])
+        self.client.post('/admin/management/invoice/', {'action': 'finalize', '_selected_action': [draft.pk]})
+        draft.refresh_from_db()
+        self.assertFalse(draft.is_draft)
+        self.assertTrue(InvoiceArchive.objects.filter(invoice=draft).exists())
+        self.assertFalse(self.client.get(url).context['has_change_permission'])
+
+    def test_verify_command_detects_tampering(self):
+        archive = archive_invoice(self.invoice)
+        call_command('verify_invoice_archive', stdout=io.StringIO())
+        path = path_for(archive.sha256)
+        path.chmod(0o644)
+        path.write_bytes(path.read_bytes()[:-1] + b'X')
+        with self.assertRaises(CommandError):
+            call_command('verify_invoice_archive', stdout=io.StringIO(), stderr=io.StringIO())
+
+
+class InvoicePreviewTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('owner', password='x'))
+
+    def test_preview_matches_pdf_figures(self):
+        invoice = make_invoice(items=3, is_draft=True)
+        data = InvoiceData(invoice)
+        self.assertEqual(data.grand_total, invoice.get_grand_total() + invoice.get_roundoff())
+        response = self.client.get(f'/invoices/{invoice.id}/preview/')
+        self.assertContains(response, '35,400.00')
+        self.assertContains(response, 'INR Thirty Five Thousand Four Hundred Only')
+
+    def test_half_paisa_taxes_print_the_same_in_preview_and_pdf(self):
+        invoice = make_invoice(items=0, is_draft=True, cgst_rate=Decimal('9'), sgst_rate=Decimal('9'))
+        mobile = Mobile.objects.create(store=invoice.store, name='Nokia', model='105', imei_number='351212121212121',
+                                       purchase_price=Decimal('8'))
+        InvoiceItem.objects.create(invoice=invoice, mobile=mobile, rate=Decimal('10.50'))  # 9% = 0.945
+        preview = self.client.get(f'/invoices/{invoice.id}/preview/').content.decode()
+        pdf = self.client.get(f'/invoices/{invoice.id}/print/').content
+        drawn = set()
+        for stream in re.findall(rb'stream\r?\n(.*?)endstream', pdf, re.S):
+            try:
+                content = zlib.decompress(stream)
+            except zlib.error:
+                try:  # ASCII85-wrapped Flate
+                    content = zlib.decompress(base64.a85decode(stream.strip().removesuffix(b'~>')))
+                except (ValueError, zlib.error):
+                    continue
+            drawn.update(re.findall(rb'\(([^()]*)\) Tj', content))
+        amounts = lambda text: set(re.findall(r'\b\d[\d,]*\.\d\d\b', text))
+        self.assertIn('0.95', amounts(preview))
+        self.assertEqual(amounts(preview), amounts(b' '.join(drawn).decode('latin-1')))
+
+    def test_preview_requires_staff(self):
+        invoice = make_invoice(items=1, is_draft=True)
+        self.client.logout()
+        self.assertEqual(self.client.get(f'/invoices/{invoice.id}/preview/').status_code, 302)
+
+    def test_live_preview_uses_unsaved_rows(self):
+        mobile = Mobile.objects.create(store=main_store(), name='Vivo', model='Y21', imei_number='351111111111111',
+                                       purchase_price=Decimal('9000'))
+        response = self.client.post('/admin/management/invoice/preview/', {
+            'invoice_date': '2026-10-19', 'buyer_name': 'Walk-in', 'cgst_rate': '9', 'sgst_rate': '9',
+            'items-TOTAL_FORMS': '2',
+            'items-0-mobile': str(mobile.id), 'items-0-hsn_code': '85171300', 'items-0-quantity': '2', 'items-0-rate': '5000',
+            'items-1-mobile': '', 'items-1-rate': '',
+        })
+        self.assertContains(response, 'Vivo Y21')
+        self.assertContains(response, '11,800.00')
+
+    def test_change_form_embeds_preview(self):
+        invoice = make_invoice(items=1, is_draft=True)
+        response = self.client.get(f'/admin/management/invoice/{invoice.id}/change/')
+        self.assertContains(response, 'id="invoice-preview"')
+        self.assertContains(response, f'preview/?object_id={invoice.id}')
+
+
+class ReceiptTests(TestCase):
+    def setUp(self):
+        self.invoice = make_invoice(items=2, is_draft=True)
+
+    def test_receipt_to_file_sink(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f'{tmp}/printer.bin'
+            call_command('print_receipt', self.invoice.invoice_number, '--paper', '58', '--output', path)
+            with open(path, 'rb') as printed:
+                payload = printed.read()
+        self.assertTrue(payload.startswith(b'\x1b@'))
+        self.assertTrue(payload.endswith(b'\x1dVB\x03'))
+        self.assertIn(b'Rs.23,600.00', payload)
+
+    def test_plain_text_lines_fit_the_paper(self):
+        text = render_receipt(self.invoice, 58, escpos=False).decode('ascii')
+        self.assertTrue(all(len(line) <= 32 for line in text.splitlines()))
+        self.assertIn('CGST @ 9', text)
+        self.assertIn('INR Twenty Three Thousand Six', text)
+
+    def test_receipt_route_is_staff_only(self):
+        url = f'/invoices/{self.invoice.id}/receipt/?format=text'
+        self.assertEqual(self.client.get(url).status_code, 302)
+        clerk = User.objects.create_user('clerk', password='x', is_staff=True)
+        self.invoice.store.staff.add(clerk)
+        self.client.force_login(clerk)
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=ascii')
+        self.assertContains(response, 'TAX INVOICE')
+
+    def test_finalized_invoices_print_their_frozen_figures(self):
+        with tempfile.TemporaryDirectory() as tmp, self.settings(INVOICE_ARCHIVE_ROOT=tmp):
+            finalize_invoice(self.invoice)
+        Mobile.objects.update(name='Renamed')
+        Store.objects.update(company_name='New Letterhead')
+        self.client.force_login(User.objects.create_superuser('owner', password='x'))
+        response = self.client.get(f'/invoices/{self.invoice.id}/receipt/?format=text')
+        self.assertContains(response, '1. Samsung M0')
+        self.assertContains(response, 'Venkateshwara Mobiles')
+        self.assertNotContains(response, 'Renamed')
+        self.assertNotContains(response, 'New Letterhead')
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.march = timezone.make_aware(datetime.datetime(2026, 3, 31, 23, 59))
+        self.phone = Mobile.objects.create(
+            store=main_store(), name='Oppo', model='A78', imei_number='352222222222222', purchase_price=Decimal('12000'),
+            stock_in_date=self.march - datetime.timedelta(days=10),
+        )
+
+    def test_sale_and_return_are_kept(self):
+        self.phone.status = 'sold'
+        self.phone.sold_date = self.march + datetime.timedelta(days=1)
+        self.phone.save()
+        self.phone.status = 'available'
+        self.phone.sold_date = None
+        self.phone.save()
+        kinds = list(self.phone.movements.values_list('kind', 'quantity'))
+        self.assertEqual(kinds, [('stock_in', 1), ('sale', -1), ('return', 1)])
+        self.assertEqual(stock_at(self.march), (1, Decimal('12000')))
+        self.assertEqual(stock_at(self.march + datetime.timedelta(days=2))[0], 0)
+
+    def test_checkpoint_and_backdated_movement(self):
+        take_checkpoint(self.march)
+        with self.assertNumQueries(2):
+            self.assertEqual(stock_at(self.march + datetime.timedelta(days=1)), (1, Decimal('12000')))
+        Mobile.objects.create(store=main_store(), name='Oppo', model='A18', imei_number='353333333333333',
+                              purchase_price=Decimal('8000'), stock_in_date=self.march - datetime.timedelta(days=1))
+        self.assertFalse(StockCheckpoint.objects.exists())
+        self.assertEqual(stock_at(self.march), (2, Decimal('20000')))
+
+    def test_price_change_and_delete_adjust_valuation(self):
+        self.phone.purchase_price = Decimal('11500')
+        self.phone.save()
+        self.assertEqual(stock_at()[1], Decimal('11500'))
+        Mobile.objects.get(pk=self.phone.pk).delete()
+        self.assertEqual(stock_at(), (0, Decimal('0')))
+
+    def test_movements_are_append_only(self):
+        movement = self.phone.movements.get()
+        with self.assertRaises(ValueError):
+            movement.save()
+        with self.assertRaises(ValueError):
+            movement.delete()
+
+
+class CustomerIndexTests(TestCase):
+    def test_normalization(self):
+        for typed in ['98480 12345', '09848012345', '+91-98480-12345', '919848012345']:
+            self.assertEqual(normalize_phone(typed), '+919848012345')
+        self.assertIsNone(normalize_phone('12345'))
+        self.assertEqual(normalize_gstin(' 36aabcu9603r1zm '), '36AABCU9603R1ZM')
+        self.assertIsNone(normalize_gstin('not-a-gstin'))
+
+    def test_saves_link_repeat_buyers(self):
+        first = Mobile.objects.create(store=main_store(), name='Vivo', model='Y28', imei_number='354444444444444', purchase_price=Decimal('9000'),
+                                      customer_name='Ravi', customer_number='98480 12345')
+        second = Mobile.objects.create(store=main_store(), name='Vivo', model='Y18', imei_number='355555555555555', purchase_price=Decimal('7000'),
+                                       customer_number='+91 9848012345')
+        self.assertEqual(first.customer_id, second.customer_id)
+        invoice = make_invoice(items=1, buyer_gstin='36aabcu9603r1zm')
+        self.assertEqual(invoice.customer.gstin, '36AABCU9603R1ZM')
+        self.assertEqual(Customer.objects.count(), 2)
+
+    def test_backfill_and_history(self):
+        invoice = make_invoice(items=2, buyer_gstin='36AABCU9603R1ZM')
+        Invoice.objects.filter(pk=invoice.pk).update(customer=None)
+        Customer.objects.all().delete()
+        call_command('backfill_customers', batch_size=1, stdout=io.StringIO())
+        customer = Customer.objects.get(gstin='36AABCU9603R1ZM')
+        with self.assertNumQueries(1):
+            history = list(customer.purchase_history())
+        self.assertEqual(len(history), 2)
+        self.assertEqual({mobile.invoice_number for mobile in history}, {invoice.invoice_number})
+
+    def test_invalid_keys_are_rejected_not_dropped(self):
+        customer = Customer(name='Ravi', phone='12345', gstin='36aabcu9603r1zm')
+        with self.assertRaises(ValidationError) as raised:
+            customer.full_clean()
+        self.assertEqual(list(raised.exception.message_dict), ['phone'])
+        customer.save()
+        customer.refresh_from_db()
+        self.assertEqual((customer.phone, customer.gstin), ('12345', '36AABCU9603R1ZM'))
+
+    def test_concurrent_create_falls_back_on_the_given_key_only(self):
+        Customer.objects.create(name='Anand', phone='9700012345')
+        racer = Customer.objects.create(name='Ravi', phone='9848012345')
+        filter_, lookups = Customer.objects.filter, []
+
+        def racing_filter(*args, **kwargs):
+            # The other request inserts right after our first lookup
+            lookups.append(kwargs)
+            return Customer.objects.none() if len(lookups) == 1 else filter_(*args, **kwargs)
+        with mock.patch.object(Customer.objects, 'filter', racing_filter), \
+                mock.patch.object(Customer.objects, 'create', side_effect=IntegrityError):
+            self.assertEqual(Customer.resolve('Ravi', '98480 12345'), racer)
+
+    def test_admin_search_uses_normalized_keys(self):
+        Customer.objects.create(name='Ravi', phone='9848012345')
+        Customer.objects.create(name='Sita', phone='9700012345')
+        User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.login(username='admin', password='pw')
+        response = self.client.get('/admin/management/customer/', {'q': '098480 12345'})
+        self.assertContains(response, 'Ravi')
+        self.assertNotContains(response, 'Sita')
+        response = self.client.get('/admin/autocomplete/', {
+            'app_label': 'management', 'model_name': 'mobile', 'field_name': 'customer', 'term': '970',
+        })
+        self.assertEqual([r['text'] for r in response.json()['results']], ['Sita (+919700012345)'])
+
+
+class ColdArchiveTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = self.settings(INVOICE_ARCHIVE_ROOT=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        long_ago = timezone.now() - datetime.timedelta(days=1000)
+        self.old = make_invoice(items=2, invoice_date=long_ago.date())
+        self.recent = make_invoice(items=1, invoice_number='2026-0002')
+        for mobile in Mobile.objects.all():
+            mobile.status, mobile.sold_date = 'sold', long_ago
+            mobile.save()
+        # Old sale, but on a recent invoice: PROTECT keeps it hot
+        self.pinned = self.recent.items.get().mobile
+
+    def test_moves_old_rows_and_keeps_them_visible(self):
+        self.assertEqual(archive_old_records(dry_run=True), {'invoices': 1, 'mobiles': 2})
+        self.assertEqual(archive_old_records(batch_size=1), {'invoices': 1, 'mobiles': 2})
+        self.assertEqual(list(Invoice.objects.all()), [self.recent])
+        self.assertEqual(list(Mobile.objects.all()), [self.pinned])
+        archived = ArchivedInvoice.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.items.count(), 2)
+        self.assertEqual(ArchivedMobile.objects.count(), 2)
+        self.assertEqual(InvoiceHistory.objects.filter(archived=True).get().pk, self.old.pk)
+        self.assertEqual(MobileHistory.objects.count(), 3)
+        # Stock movements still resolve and the frozen PDF is still served
+        self.assertEqual(stock_at(), (0, Decimal('0')))
+        response = self.client.get(f'/invoices/{self.old.pk}/pdf/')
+        self.assertEqual(b''.join(response.streaming_content)[:4], b'%PDF')
+        self.assertEqual(archive_old_records(), {'invoices': 0, 'mobiles': 0})
+
+    def test_invoices_are_rendered_without_per_invoice_queries(self):
+        make_invoice(items=2, invoice_number='2023-0002', invoice_date=self.old.invoice_date)
+        with CaptureQueriesContext(connection) as queries:
+            archive_old_records()
+        reads = Counter(re.match(r'SELECT "(\w+)"', q['sql']).group(1) for q in queries if q['sql'].startswith('SELECT "'))
+        # One items/archive read for the whole batch (plus the move's own), no store reads
+        self.assertEqual([reads[table] for table in ('management_invoiceitem', 'management_invoicearchive', 'management_store')],
+                         [3, 1, 0])
+
+    def test_archived_sales_stay_in_purchase_history(self):
+        customer = Customer.resolve('Ravi', '9848012345', '36AABCU9603R1ZM')
+        Invoice.objects.filter(pk=self.old.pk).update(customer=customer)
+        Mobile.objects.create(store=main_store(), name='Vivo', model='Y28', imei_number='354444444444444',
+                              purchase_price=Decimal('9000'), status='sold', sold_date=self.pinned.sold_date,
+                              customer_number='9848012345')
+        self.assertEqual(archive_old_records(), {'invoices': 1, 'mobiles': 3})
+        with self.assertNumQueries(1):
+            history = list(customer.purchase_history())
+        self.assertEqual(len(history), 3)
+        self.assertTrue(all(mobile.archived for mobile in history))
+        self.assertEqual(sorted(str(mobile.invoice_number) for mobile in history), ['2026-0001', '2026-0001', 'None'])
+
+    def test_history_admin_is_read_only(self):
+        archive_old_records()
+        User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.login(username='admin', password='pw')
+        response = self.client.get('/admin/management/mobilehistory/', {'archived__exact': '1'})
+        self.assertContains(response, 'M0')
+        self.assertNotContains(response, 'Add mobile')
+        response = self.client.get('/admin/management/stockmovement/', {'q': 'Samsung'})
+        self.assertContains(response, ArchivedMobile.objects.first().imei_number)
+
+
+class BackupTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = f'{tmp.name}/backups'
+        self.source = f'{tmp.name}/shop.sqlite3'
+        with sqlite3.connect(self.source) as conn:
+            conn.execute('CREATE TABLE sale (note TEXT)')
+            conn.executemany('INSERT INTO sale VALUES (?)', [('x' * 200,)] * 500)
+
+    def count(self):
+        with sqlite3.connect(self.source) as conn:
+            return conn.execute('SELECT COUNT(*) FROM sale').fetchone()[0]
+
+    def test_snapshot_rotate_and_restore(self):
+        report = take_snapshot(self.source, self.root, pages=4, pause=0)
+        self.assertGreater(report.steps, 1)
+        self.assertGreater(report.max_lock_hold, 0)
+        # The intrusive lock probe only runs when asked for
+        self.assertIsNone(report.max_writer_stall)
+        self.assertGreaterEqual(take_snapshot(self.source, f'{self.root}-probed', pause=0, probe=True).max_writer_stall, 0)
+        for day in ('20260101', '20260102'):
+            shutil.copy(report.path, f'{self.root}/db-{day}-000000.sqlite3')
+        compressed, removed = rotate(self.root, keep_plain=1, keep_total=2)
+        self.assertEqual([p.name for p in snapshots(self.root)], [report.path.name, 'db-20260102-000000.sqlite3.gz'])
+        self.assertEqual((len(compressed), len(removed)), (1, 1))
+
+        with sqlite3.connect(self.source) as conn:
+            conn.execute('DELETE FROM sale')
+        restore(snapshots(self.root)[1], self.source)
+        self.assertEqual(self.count(), 500)
+
+    def test_snapshots_in_the_same_second_never_overwrite(self):
+        # backup_db --restore takes a safety snapshot right before restoring
+        restored = take_snapshot(self.source, self.root, pause=0).path
+        with sqlite3.connect(self.source) as conn:
+            conn.execute('DELETE FROM sale')
+        safety = take_snapshot(self.source, self.root, pause=0).path
+        self.assertNotEqual(safety, restored)
+        restore(restored, self.source)
+        self.assertEqual(self.count(), 500)
+
+        with mock.patch('management.db_backup.timezone.now', return_value=timezone.now()):
+            take_snapshot(self.source, self.root, pause=0)
+            with self.assertRaises(BackupError):
+                take_snapshot(self.source, self.root, pause=0)
+        self.assertEqual(len(snapshots(self.root)), 3)
+        self.assertEqual(len(os.listdir(self.root)), 3)
+
+
+class ImportTimeTests(SimpleTestCase):
+    """Worker boot must not pull in ReportLab; override the budget with IMPORT_TIME_BUDGET_MS"""
+    budget_ms = int(os.environ.get('IMPORT_TIME_BUDGET_MS', 600))
+
+    def importtime(self, *args):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'project.settings'}
+        env.pop('PRELOAD_INVOICE_PDF', None)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', *args],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        # "import time: self [us] | cumulative | name"; top-level imports are indented once
+        rows = re.findall(r'^import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)$', result.stderr, re.M)
+        modules = {name for _, _, name in rows}
+        total_ms = sum(int(cumulative) for cumulative, indent, _ in rows if len(indent) == 1) / 1000
+        return modules, total_ms
+
+    def assertWithinBudget(self, *args):
+        modules, total_ms = self.importtime(*args)
+        self.assertIn('django.urls', modules)
+        self.assertFalse({m for m in modules if m.startswith('reportlab')}, 'ReportLab imported at startup')
+        self.assertLess(total_ms, self.budget_ms, f'{" ".join(args)} spent {total_ms:.0f} ms importing')
+
+    def test_url_resolution(self):
+        self.assertWithinBudget('-c', 'import django; django.setup(); from django.urls import resolve; resolve("/invoices/1/pdf/")')
+
+    def test_manage_check(self):
+        self.assertWithinBudget('manage.py', 'check')
+
+
+class AsyncCatalogTests(TestCase):
+    def setUp(self):
+        # project.urls as routed under ASGI (project/asgi.py turns the flag on)
+        override = self.settings(ASYNC_CATALOG_VIEWS=True)
+        override.enable()
+        self.addCleanup(self.reload_urls)
+        self.addCleanup(override.disable)
+        self.reload_urls()
+
+    @staticmethod
+    def reload_urls():
+        importlib.reload(project_urls)
+        clear_url_caches()
+
+    async def test_catalog_pages_are_served_by_the_async_views(self):
+        for url, view in (('/', async_views.index), ('/phones/', async_views.phones), ('/services/', async_views.services),
+                          ('/about/', async_views.about), ('/contact/', async_views.contact)):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIs(response.resolver_match.func, view)
+            # Anonymous catalog hits take the public fast path under ASGI too
+            self.assertFalse(response.cookies)
+
+    async def test_profiling_an_async_view_is_refused(self):
+        staff = await User.objects.acreate(username='clerk', is_staff=True)
+        await self.async_client.aforce_login(staff)
+        response = await self.async_client.get('/phones/', {'profile': 'cprofile'})
+        self.assertEqual(response.status_code, 400)
+        self.assertContains(response, 'Async views cannot be profiled', status_code=400)
+
+
+class StoreTests(TestCase):
+    def setUp(self):
+        self.main = main_store()
+        self.armoor = Store.objects.create(name='Armoor', code='armoor', invoice_prefix='ARM-')
+        self.clerk = User.objects.create_user('armoor-clerk', password='x', is_staff=True)
+        self.clerk.user_permissions.set(Permission.objects.filter(codename__in=['view_mobile', 'add_invoice']))
+        self.armoor.staff.add(self.clerk)
+        for store, imei in ((self.main, '357777777777777'), (self.armoor, '358888888888888')):
+            Mobile.objects.create(store=store, name='Redmi', model=store.code, imei_number=imei,
+                                  purchase_price=Decimal('8000'))
+
+    def test_each_store_numbers_its_own_series(self):
+        numbers = [InvoiceSeries.next_invoice_number(store, 2026) for store in (self.main, self.armoor, self.main)]
+        self.assertEqual(numbers, ['2026-0001', 'ARM-2026-0001', '2026-0002'])
+        self.assertEqual(InvoiceSeries.next_invoice_number(self.armoor, 2027), 'ARM-2027-0001')
+
+    def test_staff_only_see_their_stores(self):
+        self.client.force_login(self.clerk)
+        response = self.client.get('/admin/management/mobile/')
+        self.assertContains(response, '358888888888888')
+        self.assertNotContains(response, '357777777777777')
+        response = self.client.get('/admin/management/invoice/add/')
+        self.assertEqual(response.context['adminform'].form.initial['store'], self.armoor.pk)
+
+    def test_history_ledgers_and_customers_are_scoped_too(self):
+        customer = Customer.resolve('Ravi', '9848012345')
+        for mobile in Mobile.objects.all():
+            mobile.customer, mobile.status = customer, 'sold'
+            mobile.save()
+            PriceChange.objects.create(mobile=mobile, new_price=Decimal('9000'), rule=f'set {mobile.model}')
+        make_invoice(items=0, invoice_number='MAIN-1')
+        make_invoice(items=0, invoice_number='ARM-1', store=self.armoor)
+        self.clerk.user_permissions.add(*Permission.objects.filter(codename__in=[
+            'view_mobilehistory', 'view_invoicehistory', 'view_stockmovement', 'view_pricechange', 'view_customer',
+        ]))
+        self.client.force_login(self.clerk)
+        for url, own, other in (
+            ('/admin/management/mobilehistory/', '358888888888888', '357777777777777'),
+            ('/admin/management/invoicehistory/', 'ARM-1', 'MAIN-1'),
+            ('/admin/management/stockmovement/', '358888888888888', '357777777777777'),
+            ('/admin/management/pricechange/', 'set armoor', 'set main'),
+            (f'/admin/management/customer/{customer.pk}/change/', '358888888888888', '357777777777777'),
+        ):
+            response = self.client.get(url)
+            self.assertContains(response, own, msg_prefix=url)
+            self.assertNotContains(response, other, msg_prefix=url)
+
+    def test_invoice_views_are_scoped_to_the_staff_stores(self):
+        own, other = make_invoice(items=0, store=self.armoor), make_invoice(items=0, invoice_number='MAIN-1')
+        self.client.force_login(self.clerk)
+        for url in ('/invoices/{}/preview/', '/invoices/{}/receipt/?format=text'):
+            self.assertEqual(self.client.get(url.format(own.id)).status_code, 200)
+            self.assertEqual(self.client.get(url.format(other.id)).status_code, 404)
+        response = self.client.post('/admin/management/invoice/preview/', {
+            'invoice_date': '2026-10-19', 'buyer_name': 'Walk-in', 'cgst_rate': '9', 'sgst_rate': '9',
+            'items-TOTAL_FORMS': '2',
+            **{f'items-{i}-mobile': str(mobile.id) for i, mobile in enumerate(Mobile.objects.order_by('store__code'))},
+        })
+        self.assertContains(response, 'Redmi armoor')
+        self.assertNotContains(response, 'Redmi main')
+
+    def test_live_preview_needs_invoice_permissions(self):
+        other = make_invoice(items=0, invoice_number='MAIN-1')
+        nobody = User.objects.create_user('nobody', password='x', is_staff=True)
+        self.armoor.staff.add(nobody)
+        self.client.force_login(nobody)
+        self.assertEqual(self.client.post('/admin/management/invoice/preview/').status_code, 403)
+        self.client.force_login(self.clerk)
+        self.assertEqual(self.client.post('/admin/management/invoice/preview/').status_code, 200)
+        for object_id in (other.id, 0):
+            response = self.client.post(f'/admin/management/invoice/preview/?object_id={object_id}')
+            self.assertEqual(response.status_code, 403)
+
+    def test_items_must_come_from_the_invoice_store(self):
+        invoice = make_invoice(items=0, store=self.armoor)
+        item = InvoiceItem(invoice=invoice, mobile=Mobile.objects.get(store=self.main), rate=Decimal('9000'))
+        with self.assertRaises(ValidationError):
+            item.full_clean()
+
+    def test_catalog_filters_by_store(self):
+        response = self.client.get('/phones/', {'store': 'armoor'})
+        self.assertEqual([m.model for m in response.context['mobiles']], ['armoor'])
+
+
+class PublicSiteTests(TestCase):
+    def test_cookieless_catalog_hits_skip_the_session_stack(self):
+        response = self.client.get('/phones/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+        self.assertFalse(response.cookies)
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_staff_and_other_pages_keep_the_full_stack(self):
+        self.client.force_login(User.objects.create_user('clerk', password='x', is_staff=True))
+        self.assertTrue(self.client.get('/phones/').wsgi_request.user.is_authenticated)
+        self.client.logout()
+        self.assertTrue(hasattr(self.client.get('/admin/login/').wsgi_request, 'session'))
+
+    def test_unknown_hosts_are_still_rejected(self):
+        self.assertEqual(self.client.get('/about/', HTTP_HOST='evil.example').status_code, 400)
+
+
+class RepricingTests(TestCase):
+    def setUp(self):
+        store, now = main_store(), timezone.now()
+        def phone(imei, name, model, bought, price, days, status='available'):
+            return Mobile.objects.create(store=store, name=name, model=model, imei_number=imei, purchase_price=Decimal(bought),
+                                         selling_price=price and Decimal(price), status=status,
+                                         stock_in_date=now - datetime.timedelta(days=days))
+        self.old = phone('359000000000001', 'Samsung', 'M14', '10000', '11000', 100)
+        self.fresh = phone('359000000000002', 'Samsung', 'M14', '10000', None, 10)
+        self.vivo = phone('359000000000003', 'Vivo', 'Y28', '9000', '9500', 10)
+        phone('359000000000004', 'Samsung', 'M14', '10000', '11000', 100, status='sold')
+        self.rules = [
+            RepriceRule(MARKUP, Decimal('12'), round_99=True, brand='samsung', min_age_days=30),
+            RepriceRule(SET, Decimal('9999'), brand='Vivo'),
+        ]
+
+    def prices(self):
+        return [Mobile.objects.get(pk=m.pk).selling_price for m in (self.old, self.fresh, self.vivo)]
+
+    def test_dry_run_then_single_update(self):
+        diff = [(row['pk'], row['selling_price'], row['new_price']) for row in preview_repricing(self.rules)]
+        self.assertEqual(diff, [(self.old.pk, Decimal('11000'), Decimal('11299')), (self.vivo.pk, Decimal('9500'), Decimal('9999'))])
+        self.assertEqual(self.prices(), [Decimal('11000'), None, Decimal('9500')])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(apply_repricing(self.rules), 2)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('CASE', updates[0])
+        self.assertEqual(self.prices(), [Decimal('11299'), None, Decimal('9999')])
+        self.assertEqual(PriceChange.objects.get(mobile=self.vivo).old_price, Decimal('9500'))
+        self.assertEqual(apply_repricing(self.rules), 0)
+
+    def test_round_mode_skips_unpriced_phones(self):
+        self.assertEqual(apply_repricing([RepriceRule(ROUND)]), 2)
+        self.assertEqual(self.prices(), [Decimal('11099'), None, Decimal('9599')])
+
+    def test_command_is_a_dry_run_by_default(self):
+        out = io.StringIO()
+        call_command('reprice', '--brand', 'vivo', '--set', '9999', stdout=out)
+        self.assertIn('Would reprice 1 mobile(s)', out.getvalue())
+        self.assertEqual(self.prices()[2], Decimal('9500'))
+        call_command('reprice', '--markup', '10', '--apply', stdout=out)
+        self.assertEqual(self.prices(), [Decimal('11000'), Decimal('11000'), Decimal('9900')])
+        with self.assertRaises(CommandError):
+            call_command('reprice', '--brand', 'vivo')
+
+    def test_admin_action_previews_then_applies(self):
+        self.client.force_login(User.objects.create_superuser('owner', password='x'))
+        data = {'action': 'reprice', '_selected_action': [self.old.pk, self.vivo.pk], 'mode': SET, 'value': '12000'}
+        response = self.client.post('/admin/management/mobile/', {**data, 'preview': '1'})
+        self.assertContains(response, 'Dry run: 2 price(s) would change')
+        self.assertEqual(self.prices()[0], Decimal('11000'))
+        response = self.client.post('/admin/management/mobile/', {**data, 'apply': '1'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.prices(), [Decimal('12000'), None, Decimal('12000')])
+        self.assertEqual(PriceChange.objects.filter(changed_by__username='owner').count(), 2)
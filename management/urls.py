@@ -8,4 +8,6 @@ urlpatterns = [
     # Backward-compatible routes so existing links don't 404
     path('<int:invoice_id>/pdf/', views.print_invoice, name='download_pdf'),
     path('<int:invoice_id>/view/', views.print_invoice, name='view_pdf'),
+    path('<int:invoice_id>/preview/', views.invoice_preview, name='preview'),
+    path('<int:invoice_id>/receipt/', views.print_receipt, name='receipt'),
 ]
@@ -1,26 +1,108 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render, get_object_or_404
 from django.http import HttpResponse
-from .models import Invoice, Mobile
-from .invoice_pdf import generate_invoice_pdf
+from django.db.models import Prefetch, prefetch_related_objects
+from .models import ArchivedInvoice, Invoice, InvoiceItem, Mobile, Store
+from .invoice_data import InvoiceData
+from .pdf_archive import archive_invoice, serve_archive
+from .profiling import StageTimer
+from .public_site import public_page
+from .receipt import render_invoice_receipt
+from .query_budget import query_budget
 
 
+# Invoice + items for a draft; the first print of a finalized invoice adds the
+# archive INSERT and its savepoint pair. Archived ones are a single query.
+@query_budget(5)
 def print_invoice(request, invoice_id):
-    """Print/View invoice as PDF in browser - generates fresh PDF with current data"""
-    invoice = get_object_or_404(Invoice, id=invoice_id)
+    """Print/View invoice as PDF in browser.
+
+    Finalized invoices are served from the immutable archive (archived on
+    first request if needed); drafts are rendered fresh with current data.
+    Invoices moved to cold storage are still served from their frozen PDF.
+    """
+    invoice = Invoice.objects.select_related('archive', 'store').filter(id=invoice_id).first()
+    if invoice is None:
+        archived = get_object_or_404(ArchivedInvoice.objects.exclude(sha256=''), id=invoice_id)
+        return serve_archive(request, archived, f'Invoice_{archived.invoice_number}.pdf')
+    filename = f'Invoice_{invoice.invoice_number}.pdf'
+    # Set by ProfilerMiddleware when a staff user asks for ?profile=
+    timer = getattr(request, 'stage_timer', None) or StageTimer()
+    if not invoice.is_draft:
+        archive = getattr(invoice, 'archive', None) or archive_invoice(invoice, timer=timer)
+        response = serve_archive(request, archive, filename)
+        timer.lap('archive_open')
+        return response
+
+    prefetch_related_objects([invoice], Prefetch('items', queryset=InvoiceItem.objects.select_related('mobile')))
+    timer.lap('data_load')
     
     # Generate PDF dynamically - always with current invoice data
-    pdf_buffer = generate_invoice_pdf(invoice)
+    # (imported here so ReportLab loads on first print, not at worker boot)
+    from .invoice_pdf import generate_invoice_pdf
+    pdf_buffer = generate_invoice_pdf(invoice, timer=timer)
     
     # Create response to view in browser
     response = HttpResponse(pdf_buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'inline; filename="Invoice_{invoice.invoice_number}.pdf"'
+    response['Content-Disposition'] = f'inline; filename="{filename}"'
     
     return response
 
 
+def staff_invoices(request):
+    """Invoices of the branches the signed-in staff member works at"""
+    return Invoice.objects.filter(store__in=Store.objects.for_user(request.user).values('pk'))
+
+
+@staff_member_required
+@query_budget(2)
+def invoice_preview(request, invoice_id):
+    """HTML preview of the invoice, rendered from the same data as the PDF"""
+    invoice = get_object_or_404(
+        staff_invoices(request).select_related('store').prefetch_related(
+            Prefetch('items', queryset=InvoiceItem.objects.select_related('mobile'))
+        ),
+        id=invoice_id,
+    )
+    context = {
+        'invoice': invoice,
+        'data': InvoiceData(invoice),
+    }
+    return render(request, 'invoice_preview.html', context)
+
+
+@staff_member_required
+@query_budget(2)
+def print_receipt(request, invoice_id):
+    """Thermal receipt: ESC/POS bytes, or plain text with ?format=text (58/80mm via ?paper=).
+
+    Finalized invoices print the figures frozen with their archive.
+    """
+    invoice = get_object_or_404(staff_invoices(request).select_related('store', 'archive'), id=invoice_id)
+    if getattr(invoice, 'archive', None) is None or not invoice.archive.receipt:
+        prefetch_related_objects([invoice], Prefetch('items', queryset=InvoiceItem.objects.select_related('mobile')))
+    paper = int(request.GET['paper']) if request.GET.get('paper') in ('58', '80') else 80
+    if request.GET.get('format') == 'text':
+        response = HttpResponse(render_invoice_receipt(invoice, paper, escpos=False), content_type='text/plain; charset=ascii')
+        response['Content-Disposition'] = f'inline; filename="Receipt_{invoice.invoice_number}.txt"'
+    else:
+        response = HttpResponse(render_invoice_receipt(invoice, paper), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="Receipt_{invoice.invoice_number}.bin"'
+    return response
+
+
+def catalog_mobiles(request):
+    """Available stock, limited to one branch with ?store=<code>"""
+    mobiles = Mobile.objects.filter(status='available')
+    if request.GET.get('store'):
+        mobiles = mobiles.filter(store__code=request.GET['store'])
+    return mobiles
+
+
+@public_page
 def index(request):
     """Home page: highlights and featured mobiles"""
-    featured = Mobile.objects.filter(status='available')[:8]
+    featured = catalog_mobiles(request)[:8]
     context = {
         'mobiles': featured,
         'company_name': 'Venkateshwara Mobiles',
@@ -28,25 +110,29 @@ def index(request):
     return render(request, 'home.html', context)
 
 
+@public_page
 def phones(request):
     """Phones listing page"""
-    mobiles = Mobile.objects.filter(status='available')
+    mobiles = catalog_mobiles(request)
     context = {
         'mobiles': mobiles,
     }
     return render(request, 'phones.html', context)
 
 
+@public_page
 def services(request):
     """Services page"""
     return render(request, 'services.html')
 
 
+@public_page
 def about(request):
     """About page"""
     return render(request, 'about.html')
 
 
+@public_page
 def contact(request):
     """Contact page"""
     return render(request, 'contact.html')
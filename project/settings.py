@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,14 +44,23 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Cookie-less visitors of the catalog pages stop here (management/public_site.py)
+    'management.public_site.PublicSiteMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'management.profiling.ProfilerMiddleware',
 ]
 
+# Staff sessions live in a signed cookie: no session row to read on every
+# admin request. Logging out clears the cookie, but a copied cookie stays
+# valid until it expires, hence the working-day lifetime.
+SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+SESSION_COOKIE_AGE = 12 * 60 * 60
+
 ROOT_URLCONF = 'project.urls'
 
 TEMPLATES = [
@@ -119,6 +129,28 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+# Content-addressed store for the PDFs of finalized invoices
+INVOICE_ARCHIVE_ROOT = BASE_DIR / 'invoice_archive'
+
+# Load ReportLab and render a warm-up invoice at startup, for workers that
+# serve the print routes (PRELOAD_INVOICE_PDF=1 gunicorn ...); everything
+# else imports it lazily on first use
+PRELOAD_INVOICE_PDF = os.environ.get('PRELOAD_INVOICE_PDF') == '1'
+
+# Route the public catalog pages to their async versions; project/asgi.py
+# turns this on, WSGI servers keep the sync views
+ASYNC_CATALOG_VIEWS = os.environ.get('ASYNC_CATALOG_VIEWS') == '1'
+
+# Thermal receipt printer: a device node such as '/dev/usb/lp0', a file, or '-' for stdout
+RECEIPT_PRINTER = '-'
+
+# Sold mobiles and closed invoices older than this move to the archive tables
+# (manage.py archive_old_records, e.g. from a nightly cron job)
+COLD_ARCHIVE_AFTER_DAYS = 730
+
+# Snapshots written by manage.py backup_db
+BACKUP_ROOT = BASE_DIR / 'backups'
+
 # Jazzmin Configuration
 JAZZMIN_SETTINGS = {
     "site_title": "Venkateshwara Mobiles",
@@ -132,3 +164,10 @@ JAZZMIN_SETTINGS = {
         {"name": "Home", "url": "/", "permissions": ["auth.view_user"]},
     ],
 }
+
+# Query budgets (management/query_budget.py) log a structured warning; set
+# QUERY_BUDGET_RAISE=1 to make violations errors. The test runner below
+# always turns it on.
+QUERY_BUDGET_RAISE = os.environ.get('QUERY_BUDGET_RAISE') == '1'
+
+TEST_RUNNER = 'management.test_runner.QueryBudgetTestRunner'
@@ -14,9 +14,13 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from management import views as management_views
+from management import async_views, views
+
+# Async catalog views when served over ASGI (see project/asgi.py)
+management_views = async_views if settings.ASYNC_CATALOG_VIEWS else views
 
 urlpatterns = [
     path('', management_views.index, name='home'),